@@ -22,6 +22,7 @@ extern "C" {
  * ========================================================================= */
 
 #define RASHPLAYER_SHM_NAME         "/rashplayer_shm"
+#define RASHPLAYER_RESULT_SEM_NAME  "/rashplayer_results"  /* Posted with each result_ready */
 #define RASHPLAYER_MAX_FRAME_WIDTH  1920
 #define RASHPLAYER_MAX_FRAME_HEIGHT 1080
 #define RASHPLAYER_FRAME_CHANNELS   4  /* RGBA */
@@ -222,6 +223,10 @@ int vision_find_color_region(const uint8_t* frame, int width, int height,
 int vision_detect_edge(const uint8_t* frame, int width, int height,
                         const Rect2D* region, bool horizontal,
                         int* out_position);
+double vision_ncc_full(const uint8_t* a, const uint8_t* b, size_t n_pixels, int channels);
+void vision_hsv_multi_mask(const uint8_t* hsv, size_t n_pixels,
+                           const uint8_t* lo, const uint8_t* hi, int n_colors,
+                           uint8_t* const* masks);
 
 /* Logic Brain */
 int brain_init(void);
@@ -12,6 +12,8 @@
 #include <stdio.h>
 #include <time.h>
 #include <ctype.h>
+#include <fcntl.h>
+#include <semaphore.h>
 
 /* ============================================================================
  * INTERNAL STATE
@@ -32,6 +34,7 @@ static int              g_variable_count = 0;
 static GameState        g_current_state = GAME_STATE_IDLE;
 static bool             g_brain_initialized = false;
 static int              g_polling_hz = 60;
+static sem_t*           g_result_sem = SEM_FAILED;
 
 /* ============================================================================
  * UTILITY FUNCTIONS
@@ -303,6 +306,8 @@ int brain_init(void) {
     g_rule_count = 0;
     g_variable_count = 0;
     g_current_state = GAME_STATE_IDLE;
+    /* Wakes readers blocked on results; without it they fall back to polling */
+    g_result_sem = sem_open(RASHPLAYER_RESULT_SEM_NAME, O_CREAT, 0666, 0);
     g_brain_initialized = true;
     
     return 0;
@@ -312,6 +317,10 @@ void brain_shutdown(void) {
     g_rule_count = 0;
     g_variable_count = 0;
     g_current_state = GAME_STATE_IDLE;
+    if (g_result_sem != SEM_FAILED) {
+        sem_close(g_result_sem);
+        g_result_sem = SEM_FAILED;
+    }
     g_brain_initialized = false;
 }
 
@@ -426,6 +435,9 @@ int brain_process(SharedMemoryHeader* shm) {
     shm->brain_latency_ns = get_time_ns() - start_time;
     shm->total_latency_ns = shm->vision_latency_ns + shm->brain_latency_ns;
     shm->result_ready = 1;
+    if (g_result_sem != SEM_FAILED) {
+        sem_post(g_result_sem);
+    }
     
     return 0;
 }
@@ -61,6 +61,20 @@ static inline void rgb_to_hsv(uint8_t r, uint8_t g, uint8_t b,
     }
 }
 
+/* Branchless HSV tolerance test - returns 1 on match, 0 otherwise.
+ * Hits cluster unpredictably around object edges, so a compare chain
+ * here mispredicts on nearly every boundary pixel. */
+static inline int hsv_within_tolerance(uint8_t h, uint8_t s, uint8_t v,
+                                       const ColorHSV* target, int tolerance) {
+    int dh = abs((int)h - (int)target->h);
+    dh -= (dh > 90) * (2 * dh - 180); /* Wrap hue: dh > 90 -> 180 - dh */
+    int ds = abs((int)s - (int)target->s);
+    int dv = abs((int)v - (int)target->v);
+    
+    /* Any negative (tolerance - d) sets the sign bit of the OR */
+    return ((tolerance - dh) | (tolerance - ds) | (tolerance - dv)) >= 0;
+}
+
 /* ============================================================================
  * SIMD COLOR MATCHING
  * ========================================================================= */
@@ -109,16 +123,10 @@ static int find_color_sse(const uint8_t* frame, int width, int height,
                 rgb_to_hsv(r, g, b, &h, &s, &v);
                 
                 /* Check if within tolerance */
-                int dh = abs((int)h - (int)target->h);
-                if (dh > 90) dh = 180 - dh; /* Wrap hue */
-                int ds = abs((int)s - (int)target->s);
-                int dv = abs((int)v - (int)target->v);
-                
-                if (dh <= tolerance && ds <= tolerance && dv <= tolerance) {
-                    sum_x += x + px;
-                    sum_y += y;
-                    match_count++;
-                }
+                int hit = hsv_within_tolerance(h, s, v, target, tolerance);
+                sum_x += (x + px) & -hit;
+                sum_y += y & -hit;
+                match_count += hit;
             }
         }
     }
@@ -132,6 +140,132 @@ static int find_color_sse(const uint8_t* frame, int width, int height,
     return match_count;
 }
 
+/* AVX2 color search - converts 8 RGBA pixels to HSV per iteration.
+ * Mirrors rgb_to_hsv() exactly: all divisions are done in float32 on
+ * operands < 2^24 and truncated, which matches the integer math. */
+__attribute__((target("avx2")))
+static int find_color_avx2(const uint8_t* frame, int width, int height,
+                            const Rect2D* region, const ColorHSV* target,
+                            int tolerance, Point2D* matches, int max_matches) {
+    int rx = region->x > 0 ? region->x : 0;
+    int ry = region->y > 0 ? region->y : 0;
+    int rw = region->width > 0 ? region->width : width;
+    int rh = region->height > 0 ? region->height : height;
+
+    if (rx + rw > width) rw = width - rx;
+    if (ry + rh > height) rh = height - ry;
+
+    int match_count = 0;
+    int64_t sum_x = 0, sum_y = 0;
+
+    const __m256i byte_mask = _mm256_set1_epi32(0xFF);
+    const __m256i one = _mm256_set1_epi32(1);
+    const __m256i h_60 = _mm256_set1_epi32(60);
+    const __m256i h_90 = _mm256_set1_epi32(90);
+    const __m256i h_120 = _mm256_set1_epi32(120);
+    const __m256i h_180 = _mm256_set1_epi32(180);
+    const __m256 f_30 = _mm256_set1_ps(30.0f);
+    const __m256 f_255 = _mm256_set1_ps(255.0f);
+    const __m256i tol_vec = _mm256_set1_epi32(tolerance);
+    const __m256i target_h = _mm256_set1_epi32(target->h);
+    const __m256i target_s = _mm256_set1_epi32(target->s);
+    const __m256i target_v = _mm256_set1_epi32(target->v);
+
+    for (int y = ry; y < ry + rh; y++) {
+        const uint8_t* row = frame + y * width * 4 + rx * 4;
+        int x = rx;
+
+        /* Process 8 pixels per iteration (32 bytes = 8 RGBA) */
+        for (; x <= rx + rw - 8; x += 8) {
+            __m256i pixels = _mm256_loadu_si256((const __m256i*)row);
+            row += 32;
+
+            __m256i r = _mm256_and_si256(pixels, byte_mask);
+            __m256i g = _mm256_and_si256(_mm256_srli_epi32(pixels, 8), byte_mask);
+            __m256i b = _mm256_and_si256(_mm256_srli_epi32(pixels, 16), byte_mask);
+
+            __m256i vmax = _mm256_max_epi32(r, _mm256_max_epi32(g, b));
+            __m256i vmin = _mm256_min_epi32(r, _mm256_min_epi32(g, b));
+            __m256i delta = _mm256_sub_epi32(vmax, vmin);
+
+            /* S = 255 * delta / max (max == 0 implies delta == 0) */
+            __m256 fdelta = _mm256_cvtepi32_ps(delta);
+            __m256i s = _mm256_cvttps_epi32(_mm256_div_ps(
+                _mm256_mul_ps(fdelta, f_255),
+                _mm256_cvtepi32_ps(_mm256_max_epi32(vmax, one))));
+
+            /* H numerator and offset selected by the dominant channel,
+             * with the same r > g > b precedence as rgb_to_hsv() */
+            __m256i is_r = _mm256_cmpeq_epi32(vmax, r);
+            __m256i is_g = _mm256_andnot_si256(is_r, _mm256_cmpeq_epi32(vmax, g));
+            __m256i num = _mm256_sub_epi32(r, g);
+            num = _mm256_blendv_epi8(num, _mm256_sub_epi32(b, r), is_g);
+            num = _mm256_blendv_epi8(num, _mm256_sub_epi32(g, b), is_r);
+            __m256i offset = _mm256_blendv_epi8(h_120, h_60, is_g);
+            offset = _mm256_blendv_epi8(offset,
+                                        _mm256_and_si256(_mm256_cmpgt_epi32(b, g), h_180),
+                                        is_r);
+
+            /* delta == 0 implies num == 0 and offset == 0, so h == 0 */
+            __m256i h = _mm256_add_epi32(offset, _mm256_cvttps_epi32(_mm256_div_ps(
+                _mm256_mul_ps(_mm256_cvtepi32_ps(num), f_30),
+                _mm256_cvtepi32_ps(_mm256_max_epi32(delta, one)))));
+
+            /* Check if within tolerance */
+            __m256i dh = _mm256_abs_epi32(_mm256_sub_epi32(h, target_h));
+            dh = _mm256_blendv_epi8(dh, _mm256_sub_epi32(h_180, dh),
+                                    _mm256_cmpgt_epi32(dh, h_90)); /* Wrap hue */
+            __m256i ds = _mm256_abs_epi32(_mm256_sub_epi32(s, target_s));
+            __m256i dv = _mm256_abs_epi32(_mm256_sub_epi32(vmax, target_v));
+
+            __m256i outside = _mm256_or_si256(
+                _mm256_cmpgt_epi32(dh, tol_vec),
+                _mm256_or_si256(_mm256_cmpgt_epi32(ds, tol_vec),
+                                _mm256_cmpgt_epi32(dv, tol_vec)));
+            unsigned mask = ~(unsigned)_mm256_movemask_ps(_mm256_castsi256_ps(outside)) & 0xFF;
+
+            while (mask) {
+                sum_x += x + __builtin_ctz(mask);
+                sum_y += y;
+                match_count++;
+                if (match_count >= max_matches) goto done;
+                mask &= mask - 1;
+            }
+        }
+
+        /* Handle remaining pixels */
+        for (; x < rx + rw; x++) {
+            uint8_t h, s, v;
+            rgb_to_hsv(row[0], row[1], row[2], &h, &s, &v);
+            row += 4;
+
+            int hit = hsv_within_tolerance(h, s, v, target, tolerance);
+            sum_x += x & -hit;
+            sum_y += y & -hit;
+            match_count += hit;
+            if (match_count >= max_matches) goto done;
+        }
+    }
+done:
+
+    if (match_count > 0 && matches) {
+        matches[0].x = (int32_t)(sum_x / match_count);
+        matches[0].y = (int32_t)(sum_y / match_count);
+    }
+
+    return match_count;
+}
+
+/* Runtime CPU dispatch - AVX2 is not guaranteed on x86_64 */
+static bool cpu_has_avx2(void) {
+    static int has_avx2 = -1;
+    if (has_avx2 < 0) {
+        __builtin_cpu_init();
+        has_avx2 = __builtin_cpu_supports("avx2") ? 1 : 0;
+    }
+    return has_avx2 == 1;
+}
+
 /* SSE optimized template matching using normalized cross-correlation */
 static float template_match_sse(const uint8_t* frame, int frame_width, int frame_height,
                                  int fx, int fy, const TemplateData* tmpl) {
@@ -224,17 +358,11 @@ static int find_color_neon(const uint8_t* frame, int width, int height,
             rgb_to_hsv(row[0], row[1], row[2], &h, &s, &v);
             row += 4;
             
-            int dh = abs((int)h - (int)target->h);
-            if (dh > 90) dh = 180 - dh;
-            int ds = abs((int)s - (int)target->s);
-            int dv = abs((int)v - (int)target->v);
-            
-            if (dh <= tolerance && ds <= tolerance && dv <= tolerance) {
-                sum_x += x;
-                sum_y += y;
-                match_count++;
-                if (match_count >= max_matches) goto done;
-            }
+            int hit = hsv_within_tolerance(h, s, v, target, tolerance);
+            sum_x += x & -hit;
+            sum_y += y & -hit;
+            match_count += hit;
+            if (match_count >= max_matches) goto done;
         }
     }
 done:
@@ -275,17 +403,11 @@ static int find_color_scalar(const uint8_t* frame, int width, int height,
             rgb_to_hsv(row[0], row[1], row[2], &h, &s, &v);
             row += 4;
             
-            int dh = abs((int)h - (int)target->h);
-            if (dh > 90) dh = 180 - dh;
-            int ds = abs((int)s - (int)target->s);
-            int dv = abs((int)v - (int)target->v);
-            
-            if (dh <= tolerance && ds <= tolerance && dv <= tolerance) {
-                sum_x += x;
-                sum_y += y;
-                match_count++;
-                if (match_count >= max_matches) goto done;
-            }
+            int hit = hsv_within_tolerance(h, s, v, target, tolerance);
+            sum_x += x & -hit;
+            sum_y += y & -hit;
+            match_count += hit;
+            if (match_count >= max_matches) goto done;
         }
     }
 done:
@@ -389,6 +511,9 @@ int vision_find_color_region(const uint8_t* frame, int width, int height,
     const Rect2D* r = region ? region : &full_region;
     
 #ifdef USE_SSE
+    if (cpu_has_avx2()) {
+        return find_color_avx2(frame, width, height, r, color, tolerance, out_center, 10000);
+    }
     return find_color_sse(frame, width, height, r, color, tolerance, out_center, 10000);
 #elif defined(USE_NEON)
     return find_color_neon(frame, width, height, r, color, tolerance, out_center, 10000);
@@ -459,6 +584,80 @@ VisionResult* vision_find_template(const uint8_t* frame, int width, int height,
     return &result;
 }
 
+/* Zero-mean NCC of two equally sized interleaved buffers (TM_CCOEFF_NORMED
+ * at a single position). Like OpenCV, the mean is taken per channel while
+ * the covariance and variances are summed over all channels. One pass of
+ * integer sums, so GCC vectorizes the single-channel case at -O3. */
+#define NCC_MAX_CHANNELS 4
+
+double vision_ncc_full(const uint8_t* a, const uint8_t* b, size_t n_pixels, int channels) {
+    uint64_t sum_a[NCC_MAX_CHANNELS] = {0}, sum_b[NCC_MAX_CHANNELS] = {0};
+    uint64_t sum_aa = 0, sum_bb = 0, sum_ab = 0;
+    
+    if (n_pixels == 0 || channels < 1 || channels > NCC_MAX_CHANNELS) return 0.0;
+    
+    if (channels == 1) {
+        for (size_t i = 0; i < n_pixels; i++) {
+            uint32_t va = a[i], vb = b[i];
+            sum_a[0] += va;
+            sum_b[0] += vb;
+            sum_aa += va * va;
+            sum_bb += vb * vb;
+            sum_ab += va * vb;
+        }
+    } else {
+        for (size_t i = 0; i < n_pixels; i++) {
+            for (int c = 0; c < channels; c++) {
+                uint32_t va = a[i * channels + c], vb = b[i * channels + c];
+                sum_a[c] += va;
+                sum_b[c] += vb;
+                sum_aa += va * va;
+                sum_bb += vb * vb;
+                sum_ab += va * vb;
+            }
+        }
+    }
+    
+    double inv_n = 1.0 / (double)n_pixels;
+    double var_a = (double)sum_aa, var_b = (double)sum_bb, cov = (double)sum_ab;
+    for (int c = 0; c < channels; c++) {
+        var_a -= (double)sum_a[c] * (double)sum_a[c] * inv_n;
+        var_b -= (double)sum_b[c] * (double)sum_b[c] * inv_n;
+        cov -= (double)sum_a[c] * (double)sum_b[c] * inv_n;
+    }
+    
+    double denom = sqrt(var_a * var_b);
+    return denom > 0.0 ? cov / denom : 0.0;
+}
+
+/* inRange for several HSV ranges in one pass over the image. Pixels are
+ * walked in L1-sized blocks and every color is tested against a block
+ * before moving on, so the HSV data is read from memory once while each
+ * per-color inner loop stays a simple vectorizable compare. masks[c]
+ * receives 255 where lo[c] <= pixel <= hi[c] on all channels, else 0. */
+#define HSV_MASK_BLOCK 4096
+
+void vision_hsv_multi_mask(const uint8_t* hsv, size_t n_pixels,
+                           const uint8_t* lo, const uint8_t* hi, int n_colors,
+                           uint8_t* const* masks) {
+    for (size_t start = 0; start < n_pixels; start += HSV_MASK_BLOCK) {
+        size_t end = start + HSV_MASK_BLOCK < n_pixels ? start + HSV_MASK_BLOCK : n_pixels;
+        
+        for (int c = 0; c < n_colors; c++) {
+            const uint8_t h_lo = lo[3 * c], s_lo = lo[3 * c + 1], v_lo = lo[3 * c + 2];
+            const uint8_t h_hi = hi[3 * c], s_hi = hi[3 * c + 1], v_hi = hi[3 * c + 2];
+            uint8_t* mask = masks[c];
+            
+            for (size_t i = start; i < end; i++) {
+                const uint8_t h = hsv[3 * i], s = hsv[3 * i + 1], v = hsv[3 * i + 2];
+                mask[i] = (uint8_t)-((h >= h_lo) & (h <= h_hi) &
+                                     (s >= s_lo) & (s <= s_hi) &
+                                     (v >= v_lo) & (v <= v_hi));
+            }
+        }
+    }
+}
+
 int vision_detect_edge(const uint8_t* frame, int width, int height,
                         const Rect2D* region, bool horizontal,
                         int* out_position) {
@@ -494,26 +693,37 @@ int vision_detect_edge(const uint8_t* frame, int width, int height,
             }
         }
     } else {
-        /* Vertical edge detection - scan horizontally */
-        for (int x = rx + 1; x < rx + rw - 1; x++) {
-            int gradient_sum = 0;
+        /* Vertical edge detection - accumulate per-column gradients while
+         * walking rows in memory order; a column-at-a-time walk strides a
+         * full row per pixel and misses cache on every load. The sums are
+         * per call so concurrent callers (ctypes drops the GIL) don't share. */
+        if (rw < 3) {
+            if (out_position) *out_position = -1;
+            return -1;
+        }
+        int* column_sums = calloc((size_t)rw, sizeof(int));
+        if (!column_sums) return -1;
+        
+        for (int y = ry; y < ry + rh; y++) {
+            const uint8_t* row = frame + y * width * 4 + rx * 4;
             
-            for (int y = ry; y < ry + rh; y++) {
-                const uint8_t* row = frame + y * width * 4;
-                int idx_prev = (x - 1) * 4;
-                int idx_next = (x + 1) * 4;
+            for (int c = 1; c < rw - 1; c++) {
+                const uint8_t* prev = row + (c - 1) * 4;
+                const uint8_t* next = row + (c + 1) * 4;
                 
-                int grad = abs((int)row[idx_next] - (int)row[idx_prev]) +
-                           abs((int)row[idx_next+1] - (int)row[idx_prev+1]) +
-                           abs((int)row[idx_next+2] - (int)row[idx_prev+2]);
-                gradient_sum += grad;
+                column_sums[c] += abs((int)next[0] - (int)prev[0]) +
+                                  abs((int)next[1] - (int)prev[1]) +
+                                  abs((int)next[2] - (int)prev[2]);
             }
-            
-            if (gradient_sum > max_gradient) {
-                max_gradient = gradient_sum;
-                edge_pos = x;
+        }
+        
+        for (int c = 1; c < rw - 1; c++) {
+            if (column_sums[c] > max_gradient) {
+                max_gradient = column_sums[c];
+                edge_pos = rx + c;
             }
         }
+        free(column_sums);
     }
     
     if (out_position) {
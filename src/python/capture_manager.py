@@ -5,7 +5,7 @@ Single capture source shared between preview and processing
 
 import threading
 import time
-from typing import Optional, Callable, List
+from typing import Optional, Callable, List, Tuple
 import numpy as np
 
 from device_manager import DeviceInterface
@@ -17,21 +17,22 @@ class CaptureManager:
     def __init__(self, device: DeviceInterface):
         self.device = device
         self._running = False
-        self._callbacks: List[Callable[[np.ndarray], None]] = []
+        # Immutable snapshot swapped on change so on_frame never takes the lock
+        self._callbacks: Tuple[Callable[[np.ndarray], None], ...] = ()
         self._lock = threading.Lock()
         self._latest_frame: Optional[np.ndarray] = None
     
     def add_callback(self, callback: Callable[[np.ndarray], None]) -> None:
-        """Add a frame callback"""
+        """Add a frame callback; frames are shared read-only views"""
         with self._lock:
             if callback not in self._callbacks:
-                self._callbacks.append(callback)
+                self._callbacks = self._callbacks + (callback,)
     
     def remove_callback(self, callback: Callable[[np.ndarray], None]) -> None:
         """Remove a frame callback"""
         with self._lock:
             if callback in self._callbacks:
-                self._callbacks.remove(callback)
+                self._callbacks = tuple(cb for cb in self._callbacks if cb != callback)
     
     def start(self) -> bool:
         """Start capture if not already running"""
@@ -41,13 +42,16 @@ class CaptureManager:
         self._running = True
         
         def on_frame(frame: np.ndarray):
+            # Every subscriber gets the same read-only view of the device's
+            # buffer; one that needs to modify it must copy first
+            frame = frame.view()
+            frame.flags.writeable = False
             self._latest_frame = frame
-            with self._lock:
-                for callback in self._callbacks:
-                    try:
-                        callback(frame)
-                    except Exception as e:
-                        print(f"Callback error: {e}")
+            for callback in self._callbacks:
+                try:
+                    callback(frame)
+                except Exception as e:
+                    print(f"Callback error: {e}")
         
         return self.device.start_capture(on_frame)
     
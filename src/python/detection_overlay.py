@@ -48,18 +48,27 @@ class DetectionOverlay:
     
     def __init__(self):
         self._state = OverlayState()
+        # Scaled commands are reused until the overlay content or geometry changes
+        self._cached_commands: List[dict] = []
+        self._cached_key: Optional[Tuple[int, int, int, int]] = None
+    
+    def _invalidate(self) -> None:
+        self._cached_key = None
     
     def set_fsm_state(self, state: str) -> None:
         """Update current FSM state"""
         self._state.fsm_state = state.upper()
+        self._invalidate()
     
     def set_decision(self, text: str) -> None:
         """Update decision text"""
         self._state.decision_text = text
+        self._invalidate()
     
     def clear_detections(self) -> None:
         """Clear all detections"""
         self._state.detections.clear()
+        self._invalidate()
     
     def add_detection(self, 
                       name: str, 
@@ -76,14 +85,17 @@ class DetectionOverlay:
             confidence=confidence,
             match_location=location
         ))
+        self._invalidate()
     
     def set_tap_target(self, x: int, y: int, label: str = "TAP") -> None:
         """Set current tap target"""
         self._state.tap_target = TapTarget(x=x, y=y, label=label)
+        self._invalidate()
     
     def clear_tap_target(self) -> None:
         """Clear tap target"""
         self._state.tap_target = None
+        self._invalidate()
     
     def set_metrics(self, fps: float, latency_ms: float) -> None:
         """Update performance metrics"""
@@ -97,6 +109,35 @@ class DetectionOverlay:
     def get_opengl_commands(self, widget_width: int, widget_height: int, 
                             frame_width: int, frame_height: int) -> List[dict]:
         """Generate OpenGL rendering commands for overlay"""
+        key = (widget_width, widget_height, frame_width, frame_height)
+        if key != self._cached_key:
+            self._cached_commands = self._build_scaled_commands(*key)
+            self._cached_key = key
+        
+        commands = list(self._cached_commands)
+        
+        # FPS and latency (top-right) change every result, so never cached
+        commands.append({
+            'type': 'text',
+            'x': widget_width - 120,
+            'y': 30,
+            'text': f"FPS: {self._state.fps:.1f}",
+            'color': (1.0, 1.0, 1.0, 1.0)
+        })
+        
+        commands.append({
+            'type': 'text',
+            'x': widget_width - 120,
+            'y': 60,
+            'text': f"Latency: {self._state.latency_ms:.0f}ms",
+            'color': (1.0, 1.0, 1.0, 1.0)
+        })
+        
+        return commands
+    
+    def _build_scaled_commands(self, widget_width: int, widget_height: int,
+                               frame_width: int, frame_height: int) -> List[dict]:
+        """Build the commands that depend on detections and widget geometry"""
         commands = []
         
         # Scale factors
@@ -150,21 +191,4 @@ class DetectionOverlay:
                 'color': (0.0, 1.0, 0.5, 1.0)
             })
         
-        # FPS and latency (top-right)
-        commands.append({
-            'type': 'text',
-            'x': widget_width - 120,
-            'y': 30,
-            'text': f"FPS: {self._state.fps:.1f}",
-            'color': (1.0, 1.0, 1.0, 1.0)
-        })
-        
-        commands.append({
-            'type': 'text',
-            'x': widget_width - 120,
-            'y': 60,
-            'text': f"Latency: {self._state.latency_ms:.0f}ms",
-            'color': (1.0, 1.0, 1.0, 1.0)
-        })
-        
         return commands
@@ -3,20 +3,77 @@ RashPlayer-C: Device Manager
 Abstracts physical and virtual Android device connectivity via ADB/Scrcpy
 """
 
+import socket
 import subprocess
 import threading
 import time
-import struct
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from enum import Enum
+from pathlib import Path
 from typing import Optional, Callable, TYPE_CHECKING
+import av
 import numpy as np
 
 if TYPE_CHECKING:
     from scrcpy_stream import ScrcpyVideoStream
 
 
+ADB_SERVER = ("127.0.0.1", 5037)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("adb server closed the connection")
+        data += chunk
+    return data
+
+
+def _adb_send(sock: socket.socket, service: str) -> None:
+    """Send one length-prefixed service request and check its status"""
+    payload = service.encode()
+    sock.sendall(b"%04x" % len(payload) + payload)
+    if _recv_exact(sock, 4) != b"OKAY":
+        length = int(_recv_exact(sock, 4), 16)
+        raise RuntimeError(f"adb {service}: {_recv_exact(sock, length).decode(errors='replace')}")
+
+
+def _adb_connect(timeout: float) -> socket.socket:
+    try:
+        return socket.create_connection(ADB_SERVER, timeout=timeout)
+    except ConnectionRefusedError:
+        # Server not running yet; the client forks it once
+        subprocess.run(["adb", "start-server"], capture_output=True, timeout=10)
+        return socket.create_connection(ADB_SERVER, timeout=timeout)
+
+
+def adb_request(service: str, serial: Optional[str] = None, timeout: float = 5) -> str:
+    """Run an adb service over the server's host protocol without forking adb
+    
+    Host services (host:*) return their length-prefixed reply. With a serial,
+    the connection is switched to that device and the service output is read
+    until the device closes the stream.
+    """
+    with _adb_connect(timeout) as sock:
+        if serial is None:
+            _adb_send(sock, service)
+            length = int(_recv_exact(sock, 4), 16)
+            return _recv_exact(sock, length).decode()
+        
+        _adb_send(sock, f"host:transport:{serial}")
+        _adb_send(sock, service)
+        chunks = []
+        while True:
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks).decode()
+
+
 class DeviceType(Enum):
     PHYSICAL = "physical"
     EMULATOR = "emulator"
@@ -64,6 +121,189 @@ class DeviceInterface(ABC):
         pass
 
 
+class AdbShell:
+    """Persistent adb shell session that input commands are piped into"""
+    
+    def __init__(self, serial: str):
+        self.serial = serial
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+    
+    def _ensure_started(self) -> subprocess.Popen:
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                ["adb", "-s", self.serial, "shell"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                bufsize=0
+            )
+        return self._proc
+    
+    def run(self, command: str) -> bool:
+        """Queue a command on the shell without waiting for it to finish"""
+        with self._lock:
+            try:
+                proc = self._ensure_started()
+                proc.stdin.write(f"{command}\n".encode())
+                return True
+            except (OSError, ValueError):
+                # Shell died under us; drop it so the next call respawns
+                self._proc = None
+                return False
+    
+    def close(self) -> None:
+        with self._lock:
+            proc, self._proc = self._proc, None
+        if proc:
+            try:
+                proc.stdin.close()
+                proc.wait(timeout=2)
+            except Exception:
+                proc.kill()
+
+
+class MinitouchClient:
+    """Tap injection through a minitouch socket, bypassing the input service"""
+    
+    DEVICE_PATH = "/data/local/tmp/minitouch"
+    
+    def __init__(self, serial: str, binary: str = "minitouch", local_port: int = 0):
+        self.serial = serial
+        self.binary = Path(__file__).parent.parent.parent / binary
+        # 0 lets adb pick a free port, so several devices never share one
+        self._local_port = local_port
+        self._port = 0
+        self._proc: Optional[subprocess.Popen] = None
+        self._socket: Optional[socket.socket] = None
+        self._max_x = 0
+        self._max_y = 0
+        self._max_pressure = 0
+    
+    @property
+    def is_connected(self) -> bool:
+        return self._socket is not None
+    
+    def start(self) -> bool:
+        """Push, launch and connect to minitouch if the binary is available"""
+        if not self.binary.exists():
+            return False
+        
+        try:
+            subprocess.run(
+                ["adb", "-s", self.serial, "push", str(self.binary), self.DEVICE_PATH],
+                capture_output=True, timeout=10
+            )
+            subprocess.run(
+                ["adb", "-s", self.serial, "shell", "chmod", "755", self.DEVICE_PATH],
+                capture_output=True, timeout=5
+            )
+            self._proc = subprocess.Popen(
+                ["adb", "-s", self.serial, "shell", self.DEVICE_PATH],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+            forward = subprocess.run(
+                ["adb", "-s", self.serial, "forward", f"tcp:{self._local_port}", "localabstract:minitouch"],
+                capture_output=True, text=True, timeout=5
+            )
+            # adb prints the port it allocated for tcp:0
+            self._port = self._local_port or int(forward.stdout.strip())
+            
+            # minitouch needs a moment before the abstract socket accepts
+            for _ in range(5):
+                try:
+                    self._socket = socket.create_connection(('127.0.0.1', self._port), timeout=2)
+                    break
+                except OSError:
+                    time.sleep(0.3)
+            
+            if self._socket is None or not self._read_banner():
+                self.stop()
+                return False
+            
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            return True
+            
+        except Exception as e:
+            print(f"Minitouch start error: {e}")
+            self.stop()
+            return False
+    
+    def _read_banner(self) -> bool:
+        """Parse the banner; the '^' line gives touch space and pressure limits"""
+        reader = self._socket.makefile('rb')
+        try:
+            for _ in range(3):
+                line = reader.readline().decode().split()
+                if line and line[0] == '^':
+                    self._max_x, self._max_y, self._max_pressure = map(int, line[2:5])
+                elif line and line[0] == '$':
+                    break
+        finally:
+            reader.close()
+        return self._max_x > 0 and self._max_y > 0
+    
+    def tap(self, x: int, y: int, screen_width: int, screen_height: int) -> bool:
+        """Press and release contact 0 at a screen coordinate"""
+        if not self._socket:
+            return False
+        
+        # Touch digitizer space rarely matches the display resolution
+        tx = x * self._max_x // screen_width
+        ty = y * self._max_y // screen_height
+        pressure = min(50, self._max_pressure) if self._max_pressure else 0
+        try:
+            self._socket.sendall(f"d 0 {tx} {ty} {pressure}\nc\nu 0\nc\n".encode())
+            return True
+        except OSError as e:
+            print(f"Minitouch tap error: {e}")
+            self.stop()
+            return False
+    
+    def stop(self) -> None:
+        if self._socket:
+            try:
+                self._socket.close()
+            except Exception:
+                pass
+            self._socket = None
+        
+        if self._proc:
+            try:
+                self._proc.terminate()
+                self._proc.wait(timeout=2)
+            except Exception:
+                try:
+                    self._proc.kill()
+                except Exception:
+                    pass
+            self._proc = None
+        
+        if self._port:
+            try:
+                subprocess.run(
+                    ["adb", "-s", self.serial, "forward", "--remove", f"tcp:{self._port}"],
+                    capture_output=True, timeout=2
+                )
+            except Exception:
+                pass
+            self._port = 0
+
+
+def _query_resolution(serial: str, fallback: tuple[int, int]) -> tuple[int, int]:
+    """Screen size reported by `wm size`, or fallback if it can't be read"""
+    try:
+        output = adb_request("shell:wm size", serial)
+        if "Physical size:" in output:
+            size_str = output.split(":")[-1].strip()
+            w, h = map(int, size_str.split("x"))
+            return (w, h)
+    except Exception:
+        pass
+    return fallback
+
+
 class PhysicalAndroid(DeviceInterface):
     """Physical Android device via USB/ADB + scrcpy"""
     
@@ -71,15 +311,15 @@ class PhysicalAndroid(DeviceInterface):
         self.serial = serial
         self._stream: Optional['ScrcpyVideoStream'] = None
         self._resolution = (1920, 1080)
+        self._shell = AdbShell(serial)
+        self._touch = MinitouchClient(serial)
         
     def connect(self) -> bool:
         try:
-            result = subprocess.run(
-                ["adb", "-s", self.serial, "get-state"],
-                capture_output=True, text=True, timeout=5
-            )
-            if "device" in result.stdout:
-                self._update_resolution()
+            state = adb_request(f"host-serial:{self.serial}:get-state")
+            if "device" in state:
+                self._resolution = _query_resolution(self.serial, self._resolution)
+                self._touch.start()
                 return True
         except Exception as e:
             print(f"Connection failed: {e}")
@@ -87,20 +327,9 @@ class PhysicalAndroid(DeviceInterface):
     
     def disconnect(self) -> None:
         self.stop_capture()
+        self._touch.stop()
+        self._shell.close()
         
-    def _update_resolution(self) -> None:
-        try:
-            result = subprocess.run(
-                ["adb", "-s", self.serial, "shell", "wm", "size"],
-                capture_output=True, text=True, timeout=5
-            )
-            if "Physical size:" in result.stdout:
-                size_str = result.stdout.split(":")[-1].strip()
-                w, h = map(int, size_str.split("x"))
-                self._resolution = (w, h)
-        except Exception:
-            pass
-    
     def start_capture(self, callback: Callable[[np.ndarray], None]) -> bool:
         if self._stream:
             return False
@@ -123,25 +352,14 @@ class PhysicalAndroid(DeviceInterface):
             self._stream = None
     
     def send_tap(self, x: int, y: int) -> bool:
-        try:
-            subprocess.run(
-                ["adb", "-s", self.serial, "shell", "input", "tap", str(x), str(y)],
-                timeout=1
-            )
-            return True
-        except Exception:
-            return False
+        if self._touch.is_connected:
+            w, h = self._resolution
+            if self._touch.tap(x, y, w, h):
+                return True
+        return self._shell.run(f"input tap {x} {y}")
     
     def send_swipe(self, x1: int, y1: int, x2: int, y2: int, duration_ms: int) -> bool:
-        try:
-            subprocess.run(
-                ["adb", "-s", self.serial, "shell", "input", "swipe",
-                 str(x1), str(y1), str(x2), str(y2), str(duration_ms)],
-                timeout=duration_ms/1000 + 2
-            )
-            return True
-        except Exception:
-            return False
+        return self._shell.run(f"input swipe {x1} {y1} {x2} {y2} {duration_ms}")
     
     def get_resolution(self) -> tuple[int, int]:
         return self._resolution
@@ -158,25 +376,32 @@ class VirtualAndroid(DeviceInterface):
         self._running = False
         self._capture_thread: Optional[threading.Thread] = None
         self._frame_callback: Optional[Callable] = None
+        self._record_proc: Optional[subprocess.Popen] = None
+        self._shell = AdbShell(self.serial)
+        self._touch = MinitouchClient(self.serial)
         
     def connect(self) -> bool:
         try:
             # Connect to network ADB
-            subprocess.run(
-                ["adb", "connect", self.serial],
-                capture_output=True, timeout=10
-            )
-            result = subprocess.run(
-                ["adb", "-s", self.serial, "get-state"],
-                capture_output=True, text=True, timeout=5
-            )
-            return "device" in result.stdout
+            adb_request(f"host:connect:{self.serial}", timeout=10)
+            state = adb_request(f"host-serial:{self.serial}:get-state")
+            if "device" in state:
+                # minitouch scales taps by this, so it must be the real size
+                self._resolution = _query_resolution(self.serial, self._resolution)
+                self._touch.start()
+                return True
         except Exception:
-            return False
+            pass
+        return False
     
     def disconnect(self) -> None:
         self.stop_capture()
-        subprocess.run(["adb", "disconnect", self.serial], capture_output=True)
+        self._touch.stop()
+        self._shell.close()
+        try:
+            adb_request(f"host:disconnect:{self.serial}")
+        except Exception:
+            pass
     
     def start_capture(self, callback: Callable[[np.ndarray], None]) -> bool:
         self._frame_callback = callback
@@ -186,74 +411,74 @@ class VirtualAndroid(DeviceInterface):
         self._capture_thread.start()
         return True
     
+    def _start_screenrecord(self) -> subprocess.Popen:
+        """Spawn a long-lived screenrecord process writing raw H.264 to stdout"""
+        return subprocess.Popen(
+            ["adb", "-s", self.serial, "exec-out", "screenrecord",
+             "--output-format=h264", "-"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0
+        )
+    
+    def _stop_screenrecord(self) -> None:
+        proc, self._record_proc = self._record_proc, None
+        if proc:
+            try:
+                proc.terminate()
+                proc.wait(timeout=2)
+            except Exception:
+                try:
+                    proc.kill()
+                except Exception:
+                    pass
+    
     def _capture_loop(self) -> None:
-        """Capture frames using optimized adb screencap with minimal delay"""
+        """Decode frames from a persistent screenrecord H.264 pipe"""
         while self._running:
+            self._record_proc = proc = self._start_screenrecord()
+            # stop_capture() may clear _record_proc mid-read; keep our own handle
+            stdout = proc.stdout
+            codec = av.CodecContext.create('h264', 'r')
+            
             try:
-                # Use raw screencap format for speed
-                result = subprocess.run(
-                    ["adb", "-s", self.serial, "exec-out", "screencap"],
-                    capture_output=True, 
-                    timeout=0.1
-                )
-                
-                if result.returncode == 0 and self._frame_callback and len(result.stdout) > 0:
-                    try:
-                        # Parse raw screencap format
-                        if len(result.stdout) > 12:
-                            width = struct.unpack('<I', result.stdout[0:4])[0]
-                            height = struct.unpack('<I', result.stdout[4:8])[0]
-                            raw_data = result.stdout[12:]
-                            expected_size = width * height * 4
-                            
-                            if len(raw_data) >= expected_size:
-                                frame = np.frombuffer(raw_data[:expected_size], dtype=np.uint8)
-                                frame = frame.reshape((height, width, 4))
-                                self._frame_callback(frame)
-                    except Exception:
-                        # Fallback to PNG
-                        import io
-                        from PIL import Image
-                        result_png = subprocess.run(
-                            ["adb", "-s", self.serial, "exec-out", "screencap", "-p"],
-                            capture_output=True, timeout=0.1
-                        )
-                        if result_png.returncode == 0:
-                            img = Image.open(io.BytesIO(result_png.stdout))
-                            frame = np.array(img.convert("RGBA"))
-                            self._frame_callback(frame)
-            except subprocess.TimeoutExpired:
-                pass
-            except Exception:
-                pass
+                while self._running:
+                    data = stdout.read(65536)
+                    if not data:
+                        # screenrecord exits at its time limit; respawn it
+                        break
+                    
+                    for packet in codec.parse(data):
+                        for frame in codec.decode(packet):
+                            if self._frame_callback:
+                                self._frame_callback(frame.to_ndarray(format='rgba'))
+            except (av.error.FFmpegError, OSError, ValueError) as e:
+                print(f"Screenrecord stream error: {e}")
+            except Exception as e:
+                # Anything else is a bug, not a stream hiccup; stop cleanly
+                print(f"Screenrecord capture failed: {e!r}")
+                break
+            finally:
+                self._stop_screenrecord()
             
-            time.sleep(0.001)  # Minimal sleep for lowest latency
+            if self._running:
+                time.sleep(0.5)  # Avoid a respawn storm if adb keeps failing
     
     def stop_capture(self) -> None:
         self._running = False
+        self._stop_screenrecord()
         if self._capture_thread:
             self._capture_thread.join(timeout=2)
     
     def send_tap(self, x: int, y: int) -> bool:
-        try:
-            subprocess.run(
-                ["adb", "-s", self.serial, "shell", "input", "tap", str(x), str(y)],
-                timeout=1
-            )
-            return True
-        except Exception:
-            return False
+        if self._touch.is_connected:
+            w, h = self._resolution
+            if self._touch.tap(x, y, w, h):
+                return True
+        return self._shell.run(f"input tap {x} {y}")
     
     def send_swipe(self, x1: int, y1: int, x2: int, y2: int, duration_ms: int) -> bool:
-        try:
-            subprocess.run(
-                ["adb", "-s", self.serial, "shell", "input", "swipe",
-                 str(x1), str(y1), str(x2), str(y2), str(duration_ms)],
-                timeout=duration_ms/1000 + 2
-            )
-            return True
-        except Exception:
-            return False
+        return self._shell.run(f"input swipe {x1} {y1} {x2} {y2} {duration_ms}")
     
     def get_resolution(self) -> tuple[int, int]:
         return self._resolution
@@ -271,12 +496,10 @@ class DeviceManager:
         self.devices.clear()
         
         try:
-            result = subprocess.run(
-                ["adb", "devices", "-l"],
-                capture_output=True, text=True, timeout=10
-            )
+            # Unlike `adb devices -l`, the host service has no header line
+            output = adb_request("host:devices-l", timeout=10)
             
-            for line in result.stdout.strip().split("\n")[1:]:
+            for line in output.strip().split("\n"):
                 if not line.strip():
                     continue
                     
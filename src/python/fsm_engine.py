@@ -3,9 +3,15 @@ RashPlayer-C: FSM Engine
 Finite State Machine for game workflow execution
 """
 
+import ast
+import ctypes
+import logging
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
 from typing import Dict, List, Optional, Callable, Tuple
 from enum import Enum
 import numpy as np
@@ -14,6 +20,60 @@ import cv2
 from game_loader import GameConfig, GameState
 
 
+# Per-tick diagnostics; debug output is formatted only when enabled
+log = logging.getLogger("fsm")
+log.setLevel(logging.WARNING)
+
+
+def _core_function(name: str, argtypes: list, restype):
+    """A function from the C-Core library, or None when it isn't built"""
+    lib_path = Path(__file__).resolve().parents[2] / "build" / "librashplayer.so"
+    try:
+        fn = getattr(ctypes.CDLL(str(lib_path)), name)
+    except (OSError, AttributeError):
+        return None
+    fn.argtypes = argtypes
+    fn.restype = restype
+    return fn
+
+
+# C-Core helpers; ctypes drops the GIL for the duration of each call
+# Single-position NCC for template-sized search areas
+_NCC_FULL = _core_function(
+    "vision_ncc_full", [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int], ctypes.c_double
+)
+# inRange for several colors in one pass over the HSV frame
+_HSV_MULTI_MASK = _core_function(
+    "vision_hsv_multi_mask",
+    [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p],
+    None
+)
+
+
+# Logic conditions are restricted to arithmetic, comparisons and names
+_SAFE_GLOBALS = {"__builtins__": {}}
+_ALLOWED_NODES = (
+    ast.Expression, ast.BoolOp, ast.BinOp, ast.UnaryOp, ast.Compare,
+    ast.Name, ast.Load, ast.Constant,
+    ast.boolop, ast.operator, ast.unaryop, ast.cmpop
+)
+
+# A compiled condition: takes the variables dict, returns a truthy result
+ConditionFn = Callable[[Dict[str, float]], object]
+
+
+class _VariableLookup(ast.NodeTransformer):
+    """Rewrites bare names into subscripts on the variables argument"""
+    
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        lookup = ast.Subscript(
+            value=ast.Name(id="v", ctx=ast.Load()),
+            slice=ast.Constant(node.id),
+            ctx=ast.Load()
+        )
+        return ast.copy_location(lookup, node)
+
+
 class ActionType(Enum):
     NONE = "none"
     TAP = "tap"
@@ -51,14 +111,55 @@ class FSMState:
     decision_text: str = ""
 
 
+@dataclass
+class DetectionSnapshot:
+    """Detections for one frame, handed from the detector to the decider"""
+    state_name: str
+    detections: List[DetectionResult]
+
+
+@dataclass
+class DetectionSchedule:
+    """Per-state detectors and frame conversions, resolved once at load"""
+    targets: List[str]
+    detectors: List[Callable[[np.ndarray], DetectionResult]]
+    conditions: List[Optional[ConditionFn]] = field(default_factory=list)
+    batch: Optional[ConditionFn] = None  # Tuple of every rule's result in one call
+    batch_names: frozenset = frozenset()  # Variables batch reads; run it only when all exist
+    colors: List[str] = field(default_factory=list)  # Color targets, thresholded together
+    colors_lo: Optional[np.ndarray] = None  # (len(colors), 3) uint8, row per color
+    colors_hi: Optional[np.ndarray] = None
+    needs_pyramid: bool = False
+    needs_hsv: bool = False
+
+
 class FSMEngine:
     """Finite State Machine engine for game automation"""
     
+    # Coarse-to-fine template matching
+    PYRAMID_LEVELS = 2          # Max pyrDown levels (4x downscale)
+    PYRAMID_MIN_SIZE = 16       # Smallest template side kept in the pyramid
+    COARSE_THRESHOLD = 0.6      # Looser than final, downsampling blurs peaks
+    MAX_CANDIDATES = 3          # Coarse peaks refined at full resolution
+    
+    # Integral-image pre-filter ahead of NCC
+    MEAN_TOLERANCE = 32         # Max gray-level gap between patch and template means
+    MEAN_MAX_KEEP = 0.5         # Above this share of kept patches, search the whole region
+    
+    # OpenCL offload of the coarse NCC pass
+    OPENCL_MIN_PIXELS = 200_000  # Below this the upload costs more than the match
+    
     def __init__(self, game_config: GameConfig):
         self.config = game_config
         self.current_state = game_config.initial_state
         self._running = False
-        self._thread: Optional[threading.Thread] = None
+        # Detection and decision run on separate threads so a slow match
+        # overlaps with the previous decision's action dispatch
+        self._detect_thread: Optional[threading.Thread] = None
+        self._decide_thread: Optional[threading.Thread] = None
+        # Detections cover disjoint targets and cv2 releases the GIL, so
+        # a state's detect list fans out across cores
+        self._detect_pool: Optional[ThreadPoolExecutor] = None
         
         # Callbacks
         self._action_callback: Optional[Callable[[FSMAction], None]] = None
@@ -66,11 +167,59 @@ class FSMEngine:
         
         # Detection
         self._latest_frame: Optional[np.ndarray] = None
+        self._processed_frame: Optional[np.ndarray] = None
+        self._frame_event = threading.Event()
+        # Single-slot handoff: the detector overwrites, the decider takes
+        self._snapshot: Optional[DetectionSnapshot] = None
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_event = threading.Event()
+        # Set while the current state is waiting on its timeout, so idle
+        # wakeups without a new frame can still fire it
+        self._timeout_pending = False
+        # Preallocated conversion buffers, refilled once per captured frame
+        self._bgr = np.empty((game_config.screen_height, game_config.screen_width, 3), dtype=np.uint8)
+        self._bgr_source: Optional[np.ndarray] = None
+        self._hsv: Optional[np.ndarray] = None
+        self._hsv_source: Optional[np.ndarray] = None
+        self._pyramid: List[np.ndarray] = []
+        self._pyramid_source: Optional[np.ndarray] = None
+        self._gray_pyramid: List[np.ndarray] = []
+        self._gray_pyramid_source: Optional[np.ndarray] = None
+        self._integral: Optional[np.ndarray] = None
+        self._integral_source: Optional[np.ndarray] = None
         self._templates: Dict[str, np.ndarray] = {}
+        self._template_pyramids: Dict[str, List[np.ndarray]] = {}
+        self._template_means: Dict[str, float] = {}  # Grayscale mean per template
+        # "<name>_search" region per template, resolved at load
+        self._search_regions: Dict[str, Optional[Tuple[int, int, int, int]]] = {}
+        self._match_results: Dict[Tuple[str, str], np.ndarray] = {}
+        # Device copies for OpenCL matching: templates at load, frame pyramid
+        # levels once per frame (keyed by buffer id, cleared on rebuild)
+        self._use_opencl = cv2.ocl.haveOpenCL()
+        self._template_umats: Dict[str, List[cv2.UMat]] = {}
+        self._level_umats: Dict[int, cv2.UMat] = {}
+        self._gray_templates: set = set()  # Matched against the grayscale frame
+        # Last match per template (relative to its search area); UI elements
+        # rarely move far between ticks, so that neighbourhood is tried first
+        self._last_loc: Dict[str, Tuple[int, int]] = {}
+        self._color_bounds: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._masks: Dict[str, np.ndarray] = {}
+        # Colors whose masks were already filled for _fused_source
+        self._fused_colors: frozenset = frozenset()
+        self._fused_source: Optional[np.ndarray] = None
+        self._labels: Dict[str, np.ndarray] = {}
+        self._tap_actions: Dict[str, FSMAction] = {}
+        self._conditions: Dict[str, Optional[ConditionFn]] = {}
+        # Resolved once; the hasattr probe used to run every tick
+        self._custom_extractor: Optional[Callable[[np.ndarray], Dict[str, float]]] = \
+            getattr(game_config.game_functions, 'extract_variables', None)
         self._state_enter_time = time.time()
         
-        # Load templates
+        # Load templates and color thresholds, compile logic conditions
         self._load_templates()
+        self._load_color_bounds()
+        self._compile_conditions()
+        self._build_schedules()
     
     def _load_templates(self):
         """Load asset templates for matching"""
@@ -81,11 +230,130 @@ class FSMEngine:
                     template = cv2.imread(str(asset_path))
                     if template is not None:
                         name = asset_path.stem  # filename without extension
+                        # Colorless templates match on one channel instead of three
+                        if (template[..., 0] == template[..., 1]).all() and \
+                                (template[..., 1] == template[..., 2]).all():
+                            template = template[..., 0].copy()
+                            self._gray_templates.add(name)
                         self._templates[name] = template
+                        self._template_pyramids[name] = self._build_pyramid(template)
+                        if self._use_opencl:
+                            self._template_umats[name] = [cv2.UMat(t) for t in self._template_pyramids[name]]
+                        gray = template if template.ndim == 2 else cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+                        self._template_means[name] = float(gray.mean())
+                        region = self.config.regions.get(f"{name}_search")
+                        self._search_regions[name] = region.as_tuple() if region else None
                         print(f"Loaded template: {name}")
                 except Exception as e:
                     print(f"Failed to load template {asset_name}: {e}")
     
+    def _build_pyramid(self, template: np.ndarray) -> List[np.ndarray]:
+        """Template followed by its pyrDown levels, stopping at PYRAMID_MIN_SIZE"""
+        pyramid = [template]
+        for _ in range(self.PYRAMID_LEVELS):
+            th, tw = pyramid[-1].shape[:2]
+            if min(th, tw) // 2 < self.PYRAMID_MIN_SIZE:
+                break
+            pyramid.append(cv2.pyrDown(pyramid[-1]))
+        return pyramid
+    
+    def _load_color_bounds(self):
+        """Build inRange threshold arrays once instead of per detection"""
+        config = self.config
+        for name, lo, hi in zip(config.color_names, config.colors_lo, config.colors_hi):
+            self._color_bounds[name] = (lo, hi)
+    
+    def _compile_conditions(self):
+        """Compile every logic condition once instead of per tick"""
+        for state in self.config.states.values():
+            for rule in state.logic:
+                if rule.condition not in self._conditions:
+                    self._conditions[rule.condition] = self._compile_condition(rule.condition)
+    
+    def _build_schedules(self):
+        """Resolve each state's detect list and rules so ticks skip name lookups"""
+        self._schedules: Dict[str, DetectionSchedule] = {}
+        for state_name, state in self.config.states.items():
+            targets = list(state.detect)
+            batch, batch_names = self._compile_batch([rule.condition for rule in state.logic])
+            colors = [t for t in targets if t in self._color_bounds and t not in self._templates]
+            self._schedules[state_name] = DetectionSchedule(
+                targets=targets,
+                detectors=[self._resolve_detector(target) for target in targets],
+                conditions=[self._conditions[rule.condition] for rule in state.logic],
+                batch=batch,
+                batch_names=batch_names,
+                needs_pyramid=any(t in self._templates for t in targets),
+                needs_hsv=any(t in self._color_bounds for t in targets),
+                colors=colors,
+                colors_lo=np.array([self._color_bounds[c][0] for c in colors], dtype=np.uint8).reshape(-1, 3),
+                colors_hi=np.array([self._color_bounds[c][1] for c in colors], dtype=np.uint8).reshape(-1, 3)
+            )
+    
+    def _resolve_detector(self, target_name: str) -> Callable[[np.ndarray], DetectionResult]:
+        """Pick a target's detection method: template, then color, then region"""
+        if target_name in self._templates:
+            return partial(self._template_match, target_name)
+        if target_name in self._color_bounds:
+            return partial(self._color_detect, target_name)
+        if target_name in self.config.regions:
+            return partial(self._region_detect, target_name)
+        
+        print(f"  [DETECT] {target_name}: No detection method found (not in templates, colors, or regions)")
+        return partial(self._missing_detect, target_name)
+    
+    @staticmethod
+    def _parse_condition(condition: str) -> ast.Expression:
+        """Parse a condition, rejecting anything beyond comparisons and arithmetic"""
+        expr = condition.strip()
+        if expr == "true":
+            expr = "True"
+        
+        tree = ast.parse(expr, mode="eval")
+        for node in ast.walk(tree):
+            if not isinstance(node, _ALLOWED_NODES):
+                raise ValueError(f"{type(node).__name__} not allowed")
+        return tree
+    
+    @staticmethod
+    def _as_function(body: ast.expr) -> ConditionFn:
+        """Compile an expression into `lambda v: ...` with names read from v
+        
+        A plain call reads variables with fast locals instead of eval's
+        per-call frame setup and name lookups through a locals dict.
+        """
+        args = ast.arguments(posonlyargs=[], args=[ast.arg(arg="v")], kwonlyargs=[],
+                             kw_defaults=[], defaults=[])
+        tree = ast.Expression(body=ast.Lambda(args=args, body=_VariableLookup().visit(body)))
+        return eval(compile(ast.fix_missing_locations(tree), "<fsm>", "eval"), _SAFE_GLOBALS)
+    
+    @classmethod
+    def _compile_condition(cls, condition: str) -> Optional[ConditionFn]:
+        """Validate a condition's AST and compile it, or None if rejected"""
+        try:
+            return cls._as_function(cls._parse_condition(condition).body)
+        except (SyntaxError, ValueError) as e:
+            print(f"Condition compile error: {condition} -> {e}")
+            return None
+    
+    @classmethod
+    def _compile_batch(cls, conditions: List[str]) -> Tuple[Optional[ConditionFn], frozenset]:
+        """Compile a state's conditions into one function returning a tuple
+        
+        Conditions are side-effect free, so evaluating all of them in a
+        single call matches the first-true scan. Also returns the variable
+        names the batch reads. None when there is nothing to batch or a
+        condition was rejected.
+        """
+        if len(conditions) < 2:
+            return None, frozenset()
+        try:
+            elts = [cls._parse_condition(condition).body for condition in conditions]
+        except (SyntaxError, ValueError):
+            return None, frozenset()
+        names = frozenset(node.id for elt in elts for node in ast.walk(elt) if isinstance(node, ast.Name))
+        return cls._as_function(ast.Tuple(elts=elts, ctx=ast.Load())), names
+    
     def set_action_callback(self, callback: Callable[[FSMAction], None]):
         """Set callback for executing actions"""
         self._action_callback = callback
@@ -95,51 +363,212 @@ class FSMEngine:
         self._state_callback = callback
     
     def update_frame(self, frame: np.ndarray):
-        """Update current frame for detection"""
+        """Update current frame for detection (RGBA, or BGR to skip conversion)"""
         self._latest_frame = frame
+        self._frame_event.set()
+    
+    def _bgr_frame(self, frame: np.ndarray) -> np.ndarray:
+        """Frame as BGR, converted at most once per frame"""
+        if not (len(frame.shape) == 3 and frame.shape[2] == 4):
+            return frame
+        if frame is self._bgr_source:
+            return self._bgr
+        
+        h, w = frame.shape[:2]
+        if self._bgr.shape[:2] != (h, w):
+            self._bgr = np.empty((h, w, 3), dtype=np.uint8)
+        # Capture delivers RGBA for the GL preview; cvtColor's SIMD path drops
+        # alpha and swaps R/B far faster than a strided numpy copy
+        cv2.cvtColor(frame, cv2.COLOR_RGBA2BGR, dst=self._bgr)
+        self._bgr_source = frame
+        return self._bgr
+    
+    def _hsv_frame(self, frame: np.ndarray) -> np.ndarray:
+        """Frame as HSV, converted at most once per frame"""
+        if frame is self._hsv_source:
+            return self._hsv
+        
+        bgr = self._bgr_frame(frame)
+        if self._hsv is None or self._hsv.shape != bgr.shape:
+            self._hsv = np.empty_like(bgr)
+        cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV, dst=self._hsv)
+        self._hsv_source = frame
+        return self._hsv
+    
+    def _frame_pyramid(self, frame: np.ndarray) -> List[np.ndarray]:
+        """BGR frame and its pyrDown levels, built once per frame for all templates"""
+        if frame is self._pyramid_source:
+            return self._pyramid
+        
+        levels = [self._bgr_frame(frame)]
+        for level in range(1, self.PYRAMID_LEVELS + 1):
+            src = levels[-1]
+            dst = self._pyramid[level] if level < len(self._pyramid) else None
+            size = ((src.shape[1] + 1) // 2, (src.shape[0] + 1) // 2)
+            if dst is None or dst.shape[1::-1] != size:
+                dst = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            levels.append(cv2.pyrDown(src, dst=dst))
+        
+        self._pyramid = levels
+        self._level_umats = {}
+        self._pyramid_source = frame
+        return levels
+    
+    def _frame_gray_pyramid(self, frame: np.ndarray) -> List[np.ndarray]:
+        """Grayscale copy of the frame pyramid, built once per frame"""
+        if frame is self._gray_pyramid_source:
+            return self._gray_pyramid
+        
+        levels = []
+        for i, level in enumerate(self._frame_pyramid(frame)):
+            dst = self._gray_pyramid[i] if i < len(self._gray_pyramid) else None
+            if dst is None or dst.shape != level.shape[:2]:
+                dst = np.empty(level.shape[:2], dtype=np.uint8)
+            levels.append(cv2.cvtColor(level, cv2.COLOR_BGR2GRAY, dst=dst))
+        
+        self._gray_pyramid = levels
+        self._level_umats = {}
+        self._gray_pyramid_source = frame
+        return levels
+    
+    def _frame_integral(self, frame: np.ndarray) -> np.ndarray:
+        """Integral image of the grayscale frame, built once per frame"""
+        if frame is self._integral_source:
+            return self._integral
+        
+        gray = self._frame_gray_pyramid(frame)[0]
+        h, w = gray.shape
+        if self._integral is None or self._integral.shape != (h + 1, w + 1):
+            self._integral = np.empty((h + 1, w + 1), dtype=np.int32)
+        cv2.integral(gray, sum=self._integral, sdepth=cv2.CV_32S)
+        
+        self._integral_source = frame
+        return self._integral
+    
+    def _warm_up(self):
+        """Run the detection path once so the first real frame pays no setup cost"""
+        # OpenCV initializes its thread pool and dispatch tables on first use,
+        # and the conversion buffers are allocated on first frame
+        blank = np.zeros((self.config.screen_height, self.config.screen_width, 4), dtype=np.uint8)
+        try:
+            for name in self._color_bounds:
+                self._color_detect(name, blank)
+            for name in self._templates:
+                self._template_match(name, blank)
+        except Exception as e:
+            print(f"Detection warm-up failed: {e}")
+        finally:
+            self._bgr_source = self._hsv_source = None
+            self._pyramid_source = self._gray_pyramid_source = None
+            self._integral_source = self._fused_source = None
     
     def start(self):
         """Start FSM engine"""
         if self._running:
             return
         
+        self._warm_up()
+        self._detect_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="fsm-detect")
+        
         self._running = True
         self._state_enter_time = time.time()
-        self._thread = threading.Thread(target=self._run_loop, daemon=True)
-        self._thread.start()
+        self._timeout_pending = self._has_timeout(self.current_state)
+        self._detect_thread = threading.Thread(target=self._detect_loop, daemon=True)
+        self._decide_thread = threading.Thread(target=self._decide_loop, daemon=True)
+        self._detect_thread.start()
+        self._decide_thread.start()
         print(f"FSM started in state: {self.current_state}")
     
     def stop(self):
         """Stop FSM engine"""
         self._running = False
-        if self._thread:
-            self._thread.join(timeout=2)
-            self._thread = None
+        # Wake both loops so they see _running
+        self._frame_event.set()
+        self._snapshot_event.set()
+        for thread in (self._detect_thread, self._decide_thread):
+            if thread:
+                thread.join(timeout=2)
+        self._detect_thread = self._decide_thread = None
+        self._snapshot = None
+        if self._detect_pool:
+            self._detect_pool.shutdown(wait=False)
+            self._detect_pool = None
         print("FSM stopped")
     
-    def _run_loop(self):
-        """Main FSM loop"""
+    def _detect_loop(self):
+        """Detector loop, driven by frame arrival"""
         while self._running:
             try:
-                self._process_state()
-                time.sleep(0.016)  # ~60 Hz
+                self._frame_event.wait()
+                self._frame_event.clear()
+                # Skip detection passes on a frame that was already processed
+                if self._latest_frame is self._processed_frame:
+                    continue
+                self._processed_frame = self._latest_frame
+                
+                state_name = self.current_state
+                schedule = self._schedules.get(state_name)
+                if schedule is None:
+                    continue
+                snapshot = DetectionSnapshot(state_name, self._run_detections(schedule))
+                with self._snapshot_lock:
+                    self._snapshot = snapshot
+                self._snapshot_event.set()
             except Exception as e:
-                print(f"FSM error: {e}")
+                log.error("FSM detect error: %s", e)
                 time.sleep(0.1)
     
-    def _process_state(self):
-        """Process current state"""
+    def _decide_loop(self):
+        """Decision loop, driven by detection snapshots"""
+        while self._running:
+            try:
+                if self._snapshot_event.wait(timeout=self._idle_timeout()):
+                    self._snapshot_event.clear()
+                    with self._snapshot_lock:
+                        snapshot, self._snapshot = self._snapshot, None
+                    # Drop snapshots taken for a state we already left
+                    if snapshot and snapshot.state_name == self.current_state:
+                        self._process_state(snapshot.detections)
+                elif self._timeout_pending:
+                    state = self.config.states.get(self.current_state)
+                    if state:
+                        self._check_timeout(state)
+            except Exception as e:
+                log.error("FSM error: %s", e)
+                time.sleep(0.1)
+    
+    def _has_timeout(self, state_name: str) -> bool:
+        state = self.config.states.get(state_name)
+        return bool(state and state.timeout_ms > 0)
+    
+    def _idle_timeout(self) -> float:
+        """How long to wait for a frame before re-checking the state timeout"""
+        state = self.config.states.get(self.current_state)
+        timeout_ms = state.timeout_ms if state else 0
+        return max(timeout_ms / 4000, 0.016)
+    
+    def _check_timeout(self, state: GameState, fsm_state: Optional[FSMState] = None) -> None:
+        """Transition to on_timeout once the state has been active too long"""
+        self._timeout_pending = state.timeout_ms > 0
+        if not self._timeout_pending:
+            return
+        
+        elapsed = (time.time() - self._state_enter_time) * 1000
+        if elapsed > state.timeout_ms:
+            if fsm_state:
+                fsm_state.decision_text = f"Timeout → {state.on_timeout}"
+            if state.on_timeout:
+                self._transition(state.on_timeout)
+    
+    def _process_state(self, detections: List[DetectionResult]):
+        """Process current state against its latest detections"""
         if self.current_state not in self.config.states:
-            print(f"Unknown state: {self.current_state}")
+            log.warning("Unknown state: %s", self.current_state)
             return
         
         state = self.config.states[self.current_state]
-        detections = []
-        
-        # Run detections
-        for target in state.detect:
-            result = self._detect(target)
-            detections.append(result)
+        schedule = self._schedules[self.current_state]
+        self._timeout_pending = False
         
         # Build FSM state for overlay
         fsm_state = FSMState(
@@ -153,32 +582,25 @@ class FSMEngine:
             variables = self._extract_variables(detections)
             
             # Evaluate logic rules (sorted by priority)
-            for rule in state.logic:
-                if self._eval_condition(rule.condition, variables):
-                    fsm_state.decision_text = f"{rule.condition} → {rule.action}"
-                    
-                    if rule.action == "TAP":
-                        # Create tap action
-                        target_name = rule.target if rule.target else "tap_zone"
-                        action = self._create_tap_action_from_target(target_name)
-                        fsm_state.pending_action = action
-                        
-                        # Execute action
-                        if self._action_callback:
-                            self._action_callback(action)
-                    elif rule.action == "WAIT":
-                        fsm_state.decision_text = f"Waiting: {rule.condition}"
-                        # No action, just wait for next loop iteration
+            index = self._first_true_rule(state, schedule, variables)
+            if index is not None:
+                rule = state.logic[index]
+                fsm_state.decision_text = f"{rule.condition} → {rule.action}"
+                
+                if rule.action == "TAP":
+                    # Create tap action
+                    target_name = rule.target if rule.target else "tap_zone"
+                    action = self._create_tap_action_from_target(target_name)
+                    fsm_state.pending_action = action
                     
-                    # Use first matching rule (highest priority)
-                    break
+                    # Execute action
+                    if self._action_callback:
+                        self._action_callback(action)
+                elif rule.action == "WAIT":
+                    fsm_state.decision_text = f"Waiting: {rule.condition}"
+                    # No action, just wait for next loop iteration
             else: # No rule matched, check for timeout if no logic rule handled it
-                if state.timeout_ms > 0:
-                    elapsed = (time.time() - self._state_enter_time) * 1000
-                    if elapsed > state.timeout_ms:
-                        fsm_state.decision_text = f"Timeout → {state.on_timeout}"
-                        if state.on_timeout:
-                            self._transition(state.on_timeout)
+                self._check_timeout(state, fsm_state)
         else:
             # Original simple state logic
             found_targets = [d for d in detections if d.found]
@@ -203,12 +625,7 @@ class FSMEngine:
                 fsm_state.decision_text = f"Searching: {', '.join(state.detect)}"
                 
                 # Check timeout
-                if state.timeout_ms > 0:
-                    elapsed = (time.time() - self._state_enter_time) * 1000
-                    if elapsed > state.timeout_ms:
-                        fsm_state.decision_text = f"Timeout → {state.on_timeout}"
-                        if state.on_timeout:
-                            self._transition(state.on_timeout)
+                self._check_timeout(state, fsm_state)
         
         # Notify overlay
         if self._state_callback:
@@ -218,38 +635,37 @@ class FSMEngine:
         """Extract variables from detection results for logic evaluation"""
         
         # If game has custom functions with extract_variables, use that
-        if self.config.game_functions and hasattr(self.config.game_functions, 'extract_variables'):
+        if self._custom_extractor:
             if self._latest_frame is not None:
                 try:
-                    return self.config.game_functions.extract_variables(self._latest_frame)
+                    return self._custom_extractor(self._latest_frame)
                 except Exception as e:
-                    print(f"Game function extract_variables error: {e}")
+                    log.warning("Game function extract_variables error: %s", e)
         
         # Default extraction from detections
         variables = {}
+        found = {det.name: det for det in detections if det.found}
+        
+        # Extract bird position
+        bird = found.get("bird")
+        if bird and bird.location:
+            variables["bird_y"] = bird.location[1]
+            variables["bird_x"] = bird.location[0]
         
+        # Extract pipe positions
         pipe_top_y = None
         pipe_bottom_y = None
         
-        for det in detections:
-            if not det.found:
-                continue
-            
-            # Extract bird position
-            if det.name == "bird" and det.location:
-                variables["bird_y"] = det.location[1]
-                variables["bird_x"] = det.location[0]
-            
-            # Extract pipe positions
-            elif det.name == "pipe_top" and det.region:
-                x, y, w, h = det.region
-                pipe_top_y = y + h  # Bottom edge of top pipe
-                variables["pipe_top_y"] = pipe_top_y
-            
-            elif det.name == "pipe_bottom" and det.region:
-                x, y, w, h = det.region
-                pipe_bottom_y = y  # Top edge of bottom pipe
-                variables["pipe_bottom_y"] = pipe_bottom_y
+        pipe_top = found.get("pipe_top")
+        if pipe_top and pipe_top.region:
+            x, y, w, h = pipe_top.region
+            pipe_top_y = y + h  # Bottom edge of top pipe
+            variables["pipe_top_y"] = pipe_top_y
+        
+        pipe_bottom = found.get("pipe_bottom")
+        if pipe_bottom and pipe_bottom.region:
+            pipe_bottom_y = pipe_bottom.region[1]  # Top edge of bottom pipe
+            variables["pipe_bottom_y"] = pipe_bottom_y
         
         # Calculate gap center if both pipes detected
         if pipe_top_y is not None and pipe_bottom_y is not None:
@@ -258,111 +674,131 @@ class FSMEngine:
         
         return variables
     
-    def _eval_condition(self, condition: str, variables: Dict[str, float]) -> bool:
-        """Evaluate a condition string with variables"""
-        # Handle special case
-        if condition.strip() == "true":
-            return True
+    def _first_true_rule(self, state: GameState, schedule: DetectionSchedule,
+                         variables: Dict[str, float]) -> Optional[int]:
+        """Index of the highest-priority rule whose condition holds"""
+        # A missing variable (e.g. an undetected pipe) would fail the whole
+        # batch, so those ticks go straight to the per-rule scan
+        if schedule.batch is not None and schedule.batch_names <= variables.keys():
+            try:
+                results = schedule.batch(variables)
+                return next((i for i, hit in enumerate(results) if hit), None)
+            except (ArithmeticError, TypeError) as e:
+                # Retry rule by rule so one failing condition doesn't mask the rest
+                log.debug("Condition batch error: %s", e)
+        
+        for i, (rule, fn) in enumerate(zip(state.logic, schedule.conditions)):
+            if self._eval_rule(fn, rule.condition, variables):
+                return i
+        return None
+    
+    @staticmethod
+    def _eval_rule(fn: Optional[ConditionFn], condition: str, variables: Dict[str, float]) -> bool:
+        """Evaluate a compiled condition; rejected conditions are always false"""
+        if fn is None:
+            return False
         
         try:
-            # Replace variables in condition
-            expr = condition
-            for var_name, var_value in variables.items():
-                expr = expr.replace(var_name, str(var_value))
-            
-            # Evaluate the expression safely
-            # Only allow basic math and comparisons
-            allowed_names = {"__builtins__": {}}
-            result = eval(expr, allowed_names)
-            return bool(result)
+            return bool(fn(variables))
         except Exception as e:
-            print(f"Condition eval error: {condition} -> {e}")
+            log.debug("Condition eval error: %s -> %s", condition, e)
             return False
     
     def _create_tap_action_from_target(self, target_name: str) -> FSMAction:
         """Create tap action from a named target in config"""
+        # Named targets are fixed, so each action is built once and reused
+        action = self._tap_actions.get(target_name)
+        if action is not None:
+            return action
+        
         if target_name in self.config.targets:
             target = self.config.targets[target_name]
-            return FSMAction(
+            action = FSMAction(
                 action_type=ActionType.TAP,
                 target_x=target.x,
                 target_y=target.y
             )
         else:
-            print(f"Warning: Tap target '{target_name}' not found in config. Tapping center.")
-            return FSMAction(
+            log.warning("Tap target '%s' not found in config. Tapping center.", target_name)
+            action = FSMAction(
                 action_type=ActionType.TAP,
                 target_x=self.config.screen_width // 2,
                 target_y=self.config.screen_height // 2
             )
-    
-    def _detect(self, target_name: str) -> DetectionResult:
-        """Detect a target in current frame"""
-        if self._latest_frame is None:
-            print(f"  [DETECT] {target_name}: No frame available")
-            return DetectionResult(name=target_name, found=False)
         
-        # Check if we have a template
-        if target_name in self._templates:
-            print(f"  [DETECT] {target_name}: Using template matching")
-            return self._template_match(target_name)
-        
-        # Check if we have a color definition
-        if target_name in self.config.colors:
-            print(f"  [DETECT] {target_name}: Using color detection")
-            return self._color_detect(target_name)
+        self._tap_actions[target_name] = action
+        return action
+    
+    def _run_detections(self, schedule: DetectionSchedule) -> List[DetectionResult]:
+        """Detect all targets against one frame snapshot"""
+        frame = self._latest_frame
+        if frame is None:
+            return [DetectionResult(name=target, found=False) for target in schedule.targets]
+        if len(schedule.detectors) < 2 or self._detect_pool is None:
+            return [detect(frame) for detect in schedule.detectors]
         
-        # Check if it's a region-based detection
-        if target_name in self.config.regions:
-            # For now, just return the region center as found
-            region = self.config.regions[target_name]
-            print(f"  [DETECT] {target_name}: Region-based (always found)")
-            return DetectionResult(
-                name=target_name,
-                found=True,
-                confidence=1.0,
-                location=(region.x + region.width // 2, region.y + region.height // 2),
-                region=region.as_tuple()
-            )
+        # Shared conversions happen here so worker threads only read them
+        if schedule.needs_pyramid:
+            self._frame_integral(frame)
+        if schedule.needs_hsv:
+            if len(schedule.colors) > 1 and _HSV_MULTI_MASK is not None:
+                self._fuse_color_masks(frame, schedule)
+            else:
+                self._hsv_frame(frame)
         
-        print(f"  [DETECT] {target_name}: No detection method found (not in templates, colors, or regions)")
-        return DetectionResult(name=target_name, found=False)
+        return list(self._detect_pool.map(lambda detect: detect(frame), schedule.detectors))
+    
+    def _region_detect(self, name: str, frame: np.ndarray) -> DetectionResult:
+        """Region-based detection: the region center, always found"""
+        region = self.config.regions[name]
+        return DetectionResult(
+            name=name,
+            found=True,
+            confidence=1.0,
+            location=(region.x + region.width // 2, region.y + region.height // 2),
+            region=region.as_tuple()
+        )
+    
+    def _missing_detect(self, name: str, frame: np.ndarray) -> DetectionResult:
+        """Target with no template, color or region defined"""
+        return DetectionResult(name=name, found=False)
     
-    def _template_match(self, name: str) -> DetectionResult:
+    def _template_match(self, name: str, frame: np.ndarray) -> DetectionResult:
         """Template matching detection"""
         template = self._templates[name]
-        frame = self._latest_frame
-        
-        # Convert to BGR if needed
-        if len(frame.shape) == 3 and frame.shape[2] == 4:
-            frame = cv2.cvtColor(frame, cv2.COLOR_RGBA2BGR)
+        if name in self._gray_templates:
+            pyramid = self._frame_gray_pyramid(frame)
+        else:
+            pyramid = self._frame_pyramid(frame)
         
         # Get search region if defined
-        region = self.config.regions.get(f"{name}_search")
+        region = self._search_regions[name]
         if region:
-            x, y, w, h = region.as_tuple()
-            search_area = frame[y:y+h, x:x+w]
+            x, y, w, h = region
             offset = (x, y)
-            print(f"    Searching in region: {name}_search ({x}, {y}, {w}, {h})")
+            log.debug("    Searching in region: %s_search (%d, %d, %d, %d)", name, x, y, w, h)
         else:
-            search_area = frame
+            h, w = pyramid[0].shape[:2]
             offset = (0, 0)
-            print("    Searching in full frame")
+            log.debug("    Searching in full frame")
         
         # Template match
+        threshold = 0.7  # Configurable
         try:
-            result = cv2.matchTemplate(search_area, template, cv2.TM_CCOEFF_NORMED)
-            _, max_val, _, max_loc = cv2.minMaxLoc(result)
+            search = (offset[0], offset[1], w, h)
+            max_val, max_loc = self._window_match(name, pyramid[0], search)
+            if max_val <= threshold:
+                max_val, max_loc = self._prefiltered_match(name, frame, pyramid, search)
             
-            threshold = 0.7  # Configurable
-            print(f"    Template match score: {max_val:.3f} (threshold: {threshold})")
+            log.debug("    Template match score: %.3f (threshold: %s)", max_val, threshold)
             
             if max_val > threshold:
+                self._last_loc[name] = max_loc
                 th, tw = template.shape[:2]
                 cx = offset[0] + max_loc[0] + tw // 2
                 cy = offset[1] + max_loc[1] + th // 2
                 
-                print(f"    ✓ FOUND at ({cx}, {cy})")
+                log.debug("    ✓ FOUND at (%d, %d)", cx, cy)
                 return DetectionResult(
                     name=name,
                     found=True,
@@ -371,37 +807,216 @@ class FSMEngine:
                     region=(offset[0] + max_loc[0], offset[1] + max_loc[1], tw, th)
                 )
             else:
-                print("    ✗ NOT FOUND (score too low)")
+                log.debug("    ✗ NOT FOUND (score too low)")
         except Exception as e:
-            print(f"    ✗ Template match error: {e}")
+            log.warning("    ✗ Template match error: %s", e)
         
+        self._last_loc.pop(name, None)
         return DetectionResult(name=name, found=False)
     
-    def _color_detect(self, name: str) -> DetectionResult:
-        """Color-based detection"""
-        color_range = self.config.colors[name]
-        frame = self._latest_frame
+    def _window_match(self, name: str, frame: np.ndarray,
+                      region: Tuple[int, int, int, int]) -> Tuple[float, Tuple[int, int]]:
+        """Match in a 3x-template window around the previous hit, if there was one"""
+        last = self._last_loc.get(name)
+        if last is None:
+            return -1.0, (0, 0)
+        
+        template = self._templates[name]
+        th, tw = template.shape[:2]
+        x, y, w, h = region
+        search_area = frame[y:y+h, x:x+w]
+        h, w = search_area.shape[:2]
+        
+        x0, y0 = max(0, last[0] - tw), max(0, last[1] - th)
+        x1, y1 = min(w, last[0] + 2 * tw), min(h, last[1] + 2 * th)
+        if x1 - x0 < tw or y1 - y0 < th:
+            return -1.0, (0, 0)
+        
+        result = self._match_into((name, "window"), search_area[y0:y1, x0:x1], template)
+        _, max_val, _, (mx, my) = cv2.minMaxLoc(result)
+        return max_val, (x0 + mx, y0 + my)
+    
+    def _prefiltered_match(self, name: str, frame: np.ndarray, frame_pyramid: List[np.ndarray],
+                           region: Tuple[int, int, int, int]) -> Tuple[float, Tuple[int, int]]:
+        """Pyramid match restricted to the parts of the region whose mean fits the template"""
+        rects = self._candidate_rects(name, frame, region)
+        if rects is None:
+            return self._pyramid_match(name, frame_pyramid, region)
+        
+        x, y = region[:2]
+        best_val, best_loc = -1.0, (0, 0)
+        for rx, ry, rw, rh in rects:
+            val, (lx, ly) = self._pyramid_match(name, frame_pyramid, (x + rx, y + ry, rw, rh))
+            if val > best_val:
+                best_val, best_loc = val, (rx + lx, ry + ly)
+        return best_val, best_loc
+    
+    def _candidate_rects(self, name: str, frame: np.ndarray,
+                         region: Tuple[int, int, int, int]) -> Optional[List[Tuple[int, int, int, int]]]:
+        """Windows (relative to the region) around patches whose mean is near the template's
+        
+        Returns None when the filter would keep too much of the region to pay off.
+        """
+        integral = self._frame_integral(frame)
+        th, tw = self._templates[name].shape[:2]
+        x, y, w, h = region
+        w = min(w, integral.shape[1] - 1 - x)
+        h = min(h, integral.shape[0] - 1 - y)
+        if w < tw or h < th:
+            return None
+        
+        # Patch means on a quarter-template grid: four corner lookups each
+        sx, sy = max(1, tw // 4), max(1, th // 4)
+        xs = np.arange(x, x + w - tw + 1, sx)
+        ys = np.arange(y, y + h - th + 1, sy)[:, None]
+        sums = integral[ys + th, xs + tw] - integral[ys, xs + tw] - integral[ys + th, xs] + integral[ys, xs]
+        keep = np.abs(sums / (tw * th) - self._template_means[name]) <= self.MEAN_TOLERANCE
+        if keep.mean() > self.MEAN_MAX_KEEP:
+            return None
+        
+        # Neighbouring kept patches merge into one window per blob
+        count, _, stats, _ = cv2.connectedComponentsWithStats(keep.view(np.uint8))
+        rects = []
+        for gx, gy, gw, gh, _ in stats[1:count]:
+            x0, y0 = max(0, gx * sx - sx), max(0, gy * sy - sy)
+            x1 = min(w, (gx + gw - 1) * sx + tw + sx)
+            y1 = min(h, (gy + gh - 1) * sy + th + sy)
+            rects.append((x0, y0, x1 - x0, y1 - y0))
+        return rects
+    
+    def _pyramid_match(self, name: str, frame_pyramid: List[np.ndarray],
+                       region: Tuple[int, int, int, int]) -> Tuple[float, Tuple[int, int]]:
+        """Coarse-to-fine NCC: match at the smallest level, refine peaks at full size
         
-        # Convert to HSV
-        if len(frame.shape) == 3 and frame.shape[2] == 4:
-            frame = cv2.cvtColor(frame, cv2.COLOR_RGBA2BGR)
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        Returns the best score and its location relative to the region.
+        """
+        pyramid = self._template_pyramids[name]
+        template = pyramid[0]
+        th, tw = template.shape[:2]
+        x, y, w, h = region
+        search_area = frame_pyramid[0][y:y+h, x:x+w]
+        h, w = search_area.shape[:2]
         
-        # Create mask
-        lower = np.array(color_range.hsv_low)
-        upper = np.array(color_range.hsv_high)
-        mask = cv2.inRange(hsv, lower, upper)
+        # Deepest level whose downscaled region still holds the template
+        levels, coarse = 0, None
+        for level in range(min(len(pyramid), len(frame_pyramid)) - 1, 0, -1):
+            lh, lw = pyramid[level].shape[:2]
+            crop = frame_pyramid[level][y >> level:(y + h) >> level, x >> level:(x + w) >> level]
+            if crop.shape[0] >= lh and crop.shape[1] >= lw:
+                levels, coarse = level, crop
+                break
+        
+        if levels == 0:
+            if _NCC_FULL is not None and search_area.shape == template.shape:
+                # Only one placement: a straight dot product beats matchTemplate's setup
+                patch = np.ascontiguousarray(search_area)
+                channels = template.shape[2] if template.ndim == 3 else 1
+                return _NCC_FULL(patch.ctypes.data, template.ctypes.data, th * tw, channels), (0, 0)
+            result = self._match_into((name, "full"), search_area, template)
+            _, max_val, _, max_loc = cv2.minMaxLoc(result)
+            return max_val, max_loc
+        
+        if self._use_opencl and coarse.size >= self.OPENCL_MIN_PIXELS:
+            cy, cx = y >> levels, x >> levels
+            roi = cv2.UMat(self._level_umat(frame_pyramid[levels]),
+                           (cy, cy + coarse.shape[0]), (cx, cx + coarse.shape[1]))
+            coarse_result = cv2.matchTemplate(
+                roi, self._template_umats[name][levels], cv2.TM_CCOEFF_NORMED
+            ).get()
+        else:
+            coarse_result = self._match_into((name, "coarse"), coarse, pyramid[levels])
+        ch, cw = pyramid[levels].shape[:2]
+        margin = 2 << levels  # Covers pyrDown rounding of the peak position
+        
+        best_val, best_loc = -1.0, (0, 0)
+        for _ in range(self.MAX_CANDIDATES):
+            _, peak_val, _, (px, py) = cv2.minMaxLoc(coarse_result)
+            if peak_val < self.COARSE_THRESHOLD:
+                break
+            # Suppress this peak's neighbourhood before looking for the next
+            coarse_result[max(0, py - ch // 2):py + ch // 2 + 1,
+                          max(0, px - cw // 2):px + cw // 2 + 1] = -1.0
+            
+            # Peak back in region coordinates at full resolution
+            rx = (((x >> levels) + px) << levels) - x
+            ry = (((y >> levels) + py) << levels) - y
+            x0, y0 = max(0, rx - margin), max(0, ry - margin)
+            x1, y1 = min(w, rx + tw + margin), min(h, ry + th + margin)
+            if x1 - x0 < tw or y1 - y0 < th:
+                continue
+            
+            fine = cv2.matchTemplate(search_area[y0:y1, x0:x1], template, cv2.TM_CCOEFF_NORMED)
+            _, fine_val, _, (fx, fy) = cv2.minMaxLoc(fine)
+            if fine_val > best_val:
+                best_val, best_loc = fine_val, (x0 + fx, y0 + fy)
+        
+        return best_val, best_loc
+    
+    def _level_umat(self, level: np.ndarray) -> cv2.UMat:
+        """Device copy of a frame pyramid level, uploaded once per frame"""
+        umat = self._level_umats.get(id(level))
+        if umat is None:
+            umat = self._level_umats[id(level)] = cv2.UMat(level)
+        return umat
+    
+    def _match_into(self, key: Tuple[str, str], image: np.ndarray, template: np.ndarray) -> np.ndarray:
+        """TM_CCOEFF_NORMED into a reused result buffer
+        
+        Candidate rects differ in shape from call to call, so each key owns
+        a flat buffer that only grows, and the result is a contiguous view
+        of its prefix (a 2-D slice would make OpenCV allocate anyway).
+        Keys start with the template name; a template is only ever matched
+        on one detection thread at a time, so buffers are never shared.
+        """
+        h = image.shape[0] - template.shape[0] + 1
+        w = image.shape[1] - template.shape[1] + 1
+        buffer = self._match_results.get(key)
+        if buffer is None or buffer.size < h * w:
+            buffer = self._match_results[key] = np.empty(h * w, dtype=np.float32)
+        result = buffer[:h * w].reshape(h, w)
+        return cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED, result=result)
+    
+    def _color_scratch(self, name: str, shape: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Mask and label buffers for one color (one set per color so parallel
+        detections don't share)"""
+        mask = self._masks.get(name)
+        labels = self._labels.get(name)
+        if mask is None or labels is None or mask.shape != shape:
+            mask = self._masks[name] = np.empty(shape, dtype=np.uint8)
+            labels = self._labels[name] = np.empty(shape, dtype=np.int32)
+        return mask, labels
+    
+    def _fuse_color_masks(self, frame: np.ndarray, schedule: DetectionSchedule) -> None:
+        """Fill the masks of every color in the schedule with one pass over the HSV frame"""
+        hsv = self._hsv_frame(frame)
+        masks = [self._color_scratch(name, hsv.shape[:2])[0] for name in schedule.colors]
+        mask_ptrs = (ctypes.c_void_p * len(masks))(*(mask.ctypes.data for mask in masks))
+        _HSV_MULTI_MASK(
+            hsv.ctypes.data, hsv.shape[0] * hsv.shape[1],
+            schedule.colors_lo.ctypes.data, schedule.colors_hi.ctypes.data,
+            len(masks), mask_ptrs
+        )
+        self._fused_colors = frozenset(schedule.colors)
+        self._fused_source = frame
+    
+    def _color_detect(self, name: str, frame: np.ndarray) -> DetectionResult:
+        """Color-based detection"""
+        hsv = self._hsv_frame(frame)
+        mask, labels = self._color_scratch(name, hsv.shape[:2])
+        if frame is not self._fused_source or name not in self._fused_colors:
+            lower, upper = self._color_bounds[name]
+            cv2.inRange(hsv, lower, upper, dst=mask)
         
-        # Find contours
-        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        # One pass yields area and bbox for every blob; unlike findContours
+        # its cost doesn't grow with the number of speckles in the mask
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask, labels=labels, connectivity=8)
         
-        if contours:
-            # Get largest contour
-            largest = max(contours, key=cv2.contourArea)
-            area = cv2.contourArea(largest)
+        if count > 1:
+            # Get largest blob (label 0 is background)
+            largest = 1 + int(stats[1:, cv2.CC_STAT_AREA].argmax())
+            x, y, w, h, area = (int(v) for v in stats[largest])
             
             if area > 100:  # Minimum area threshold
-                x, y, w, h = cv2.boundingRect(largest)
                 return DetectionResult(
                     name=name,
                     found=True,
@@ -419,18 +1034,18 @@ class FSMEngine:
             # Use explicitly configured target
             target = self.config.targets[state.target]
             x, y = target.x, target.y
-            print(f"    Using target: {state.target} ({x}, {y})")
+            log.debug("    Using target: %s (%d, %d)", state.target, x, y)
         elif detection.location:
             x, y = detection.location
-            print(f"    Using detection location: ({x}, {y})")
+            log.debug("    Using detection location: (%d, %d)", x, y)
         elif detection.region:
             # Use center of detected region
             rx, ry, rw, rh = detection.region
             x, y = rx + rw // 2, ry + rh // 2
-            print(f"    Using region center: ({x}, {y})")
+            log.debug("    Using region center: (%d, %d)", x, y)
         else:
             x, y = self.config.screen_width // 2, self.config.screen_height // 2
-            print(f"    Using screen center: ({x}, {y})")
+            log.debug("    Using screen center: (%d, %d)", x, y)
         
         return FSMAction(
             action_type=ActionType.TAP,
@@ -443,6 +1058,10 @@ class FSMEngine:
         print(f"FSM: {self.current_state} → {new_state}")
         self.current_state = new_state
         self._state_enter_time = time.time()
+        self._last_loc.clear()
+        # Armed until a snapshot says otherwise, so the timeout still fires
+        # when no frames arrive
+        self._timeout_pending = self._has_timeout(new_state)
     
     @property
     def is_running(self) -> bool:
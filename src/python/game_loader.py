@@ -3,13 +3,67 @@ RashPlayer-C: Game Loader
 Loads game configuration from directory structure
 """
 
+import logging
+import os
+import pickle
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from types import ModuleType
 from dataclasses import dataclass, field
+from operator import attrgetter
 from typing import Dict, List, Optional, Tuple
-import yaml
+import numpy as np
 
+log = logging.getLogger("game_loader")
 
-@dataclass
+# Parsed GameConfig, relative to the game directory
+CACHE_FILE = Path(".cache") / "config.pkl"
+# Bump whenever the pickled GameConfig layout changes
+CACHE_VERSION = 2
+
+# Shared stand-in for absent mappings; only ever read
+_EMPTY: dict = {}
+
+# Field defaults for entries in locations.yaml and colors.yaml; keys not
+# listed here are ignored
+_TARGET_DEFAULTS = {"x": 0, "y": 0, "description": ""}
+_REGION_DEFAULTS = {"x": 0, "y": 0, "width": 100, "height": 100, "description": ""}
+_COLOR_DEFAULTS = {"hsv_low": (0, 0, 0), "hsv_high": (180, 255, 255), "description": ""}
+
+
+def _fields(data: dict, defaults: dict) -> dict:
+    """The fields named in defaults, taken from data where present"""
+    return {key: data.get(key, default) for key, default in defaults.items()}
+
+# (yaml, loader, dumper), imported on first parse or save; warm loads
+# come from the config cache and never need PyYAML
+_YAML = None
+
+
+def _yaml_codecs():
+    """PyYAML with libyaml-backed loader/dumper when PyYAML was built with it"""
+    global _YAML
+    if _YAML is None:
+        import yaml
+        try:
+            from yaml import CSafeLoader as loader, CSafeDumper as dumper
+        except ImportError:
+            from yaml import SafeLoader as loader, SafeDumper as dumper
+        _YAML = (yaml, loader, dumper)
+    return _YAML
+
+
+def _yaml_load(data: bytes):
+    """Parse one YAML document; what yaml.load does, minus its per-call wrapper"""
+    loader = _yaml_codecs()[1](data)
+    try:
+        return loader.get_single_data()
+    finally:
+        loader.dispose()
+
+
+@dataclass(slots=True)
 class TapTarget:
     """Tap target location"""
     name: str
@@ -18,7 +72,7 @@ class TapTarget:
     description: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class Region:
     """Screen region for detection"""
     name: str
@@ -32,7 +86,7 @@ class Region:
         return (self.x, self.y, self.width, self.height)
 
 
-@dataclass
+@dataclass(slots=True)
 class ColorRange:
     """HSV color range"""
     name: str
@@ -41,7 +95,7 @@ class ColorRange:
     description: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class LogicRule:
     """Decision logic rule for gameplay"""
     condition: str
@@ -50,7 +104,7 @@ class LogicRule:
     target: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class GameState:
     """FSM state definition"""
     name: str
@@ -66,7 +120,7 @@ class GameState:
     polling_hz: int = 60
 
 
-@dataclass
+@dataclass(slots=True)
 class GameConfig:
     """Complete game configuration"""
     name: str
@@ -82,11 +136,36 @@ class GameConfig:
     colors: Dict[str, ColorRange] = field(default_factory=dict)
     assets: List[str] = field(default_factory=list)
     game_functions: Optional[object] = None  # Loaded game-specific functions module
+    # Packed copies of regions and colors for vectorized consumers, row i
+    # belonging to *_names[i]; rebuild with pack_arrays() after edits
+    region_names: List[str] = field(default_factory=list)
+    regions_xywh: np.ndarray = field(default_factory=lambda: np.empty((0, 4), dtype=np.int32))
+    color_names: List[str] = field(default_factory=list)
+    colors_lo: np.ndarray = field(default_factory=lambda: np.empty((0, 3), dtype=np.uint8))
+    colors_hi: np.ndarray = field(default_factory=lambda: np.empty((0, 3), dtype=np.uint8))
+    
+    def pack_arrays(self) -> None:
+        """Rebuild the packed region and color arrays from the dicts"""
+        self.region_names = list(self.regions)
+        self.regions_xywh = np.array(
+            [r.as_tuple() for r in self.regions.values()], dtype=np.int32
+        ).reshape(-1, 4)
+        self.color_names = list(self.colors)
+        self.colors_lo = np.array(
+            [c.hsv_low for c in self.colors.values()], dtype=np.uint8
+        ).reshape(-1, 3)
+        self.colors_hi = np.array(
+            [c.hsv_high for c in self.colors.values()], dtype=np.uint8
+        ).reshape(-1, 3)
 
 
 class GameLoader:
     """Loads game configuration from directory"""
     
+    # Executed game_functions modules by (resolved path, mtime_ns), so
+    # reloading a game skips exec_module unless its source changed
+    _module_cache: Dict[Tuple[str, int], ModuleType] = {}
+    
     def __init__(self, games_dir: str = None):
         if games_dir is None:
             # Default to project_root/games
@@ -98,153 +177,62 @@ class GameLoader:
         """List available games"""
         if not self.games_dir.exists():
             return []
-        return [d.name for d in self.games_dir.iterdir() if d.is_dir()]
+        # DirEntry reuses the file type from the directory read, no stat per entry
+        with os.scandir(self.games_dir) as entries:
+            return [e.name for e in entries if e.is_dir()]
     
     def load(self, game_name: str) -> Optional[GameConfig]:
         """Load game configuration"""
         game_path = self.games_dir / game_name
         
-        if not game_path.exists():
-            print(f"Game not found: {game_name}")
+        # One directory read answers every top-level existence check below
+        try:
+            with os.scandir(game_path) as it:
+                entries = {e.name: e for e in it}
+        except (FileNotFoundError, NotADirectoryError):
+            log.error("Game not found: %s", game_name)
             return None
         
-        main_yaml = game_path / "main.yaml"
-        if not main_yaml.exists():
-            print(f"main.yaml not found in {game_name}")
+        if "main.yaml" not in entries:
+            log.error("main.yaml not found in %s", game_name)
             return None
         
         try:
-            # Load main config
-            with open(main_yaml) as f:
-                main = yaml.safe_load(f)
-            
-            config = GameConfig(
-                name=main.get("name", game_name),
-                version=main.get("version", "1.0"),
-                path=game_path,
-                initial_state=main.get("initial_state", "menu"),
-                polling_hz=main.get("polling_hz", 60),
-                screen_width=main.get("screen", {}).get("width", 1080),
-                screen_height=main.get("screen", {}).get("height", 2400)
-            )
-            
-            # Load states
-            for state_name, state_data in main.get("states", {}).items():
-                detect = state_data.get("detect", [])
-                if isinstance(detect, str):
-                    detect = [detect]
-                
-                config.states[state_name] = GameState(
-                    name=state_name,
-                    detect=detect,
-                    action=state_data.get("on_found", {}).get("action", "NONE"),
-                    target=state_data.get("on_found", {}).get("target", ""),
-                    next_state=state_data.get("on_found", {}).get("next_state", ""),
-                    timeout_ms=state_data.get("timeout_ms", 0),
-                    on_timeout=state_data.get("on_timeout", ""),
-                    workflow=state_data.get("workflow", ""),
-                    exit_on=state_data.get("exit_on", [])
-                )
-            
-            # Load locations
-            locations_yaml = game_path / "locations.yaml"
-            if locations_yaml.exists():
-                with open(locations_yaml) as f:
-                    locations = yaml.safe_load(f)
-                
-                for name, data in locations.get("targets", {}).items():
-                    config.targets[name] = TapTarget(
-                        name=name,
-                        x=data.get("x", 0),
-                        y=data.get("y", 0),
-                        description=data.get("description", "")
-                    )
-                
-                for name, data in locations.get("regions", {}).items():
-                    config.regions[name] = Region(
-                        name=name,
-                        x=data.get("x", 0),
-                        y=data.get("y", 0),
-                        width=data.get("width", 100),
-                        height=data.get("height", 100),
-                        description=data.get("description", "")
-                    )
-            
-            # Load colors
-            colors_yaml = game_path / "colors.yaml"
-            if colors_yaml.exists():
-                with open(colors_yaml) as f:
-                    colors = yaml.safe_load(f)
-                
-                for name, data in colors.get("colors", {}).items():
-                    config.colors[name] = ColorRange(
-                        name=name,
-                        hsv_low=tuple(data.get("hsv_low", [0, 0, 0])),
-                        hsv_high=tuple(data.get("hsv_high", [180, 255, 255])),
-                        description=data.get("description", "")
-                    )
-            
-            # List assets
-            assets_dir = game_path / "assets"
-            if assets_dir.exists():
-                config.assets = [f.name for f in assets_dir.iterdir() if f.is_file()]
-            
-            # Load workflow files for states that reference them
-            for state_name, state in config.states.items():
-                if state.workflow:
-                    workflow_path = game_path / state.workflow
-                    if workflow_path.exists():
-                        try:
-                            with open(workflow_path) as f:
-                                workflow_data = yaml.safe_load(f)
-                            
-                            # Update state with workflow data
-                            detect = workflow_data.get("detect", [])
-                            if isinstance(detect, str):
-                                detect = [detect]
-                            state.detect = detect
-                            state.polling_hz = workflow_data.get("polling_hz", 60)
-                            
-                            # Parse logic rules
-                            for rule_data in workflow_data.get("logic", []):
-                                rule = LogicRule(
-                                    condition=rule_data.get("condition", "true"),
-                                    action=rule_data.get("action", "WAIT"),
-                                    priority=rule_data.get("priority", 0),
-                                    target=rule_data.get("target", "")
-                                )
-                                state.logic.append(rule)
-                            
-                            # Sort logic by priority (highest first)
-                            state.logic.sort(key=lambda r: r.priority, reverse=True)
-                            
-                            print(f"  Loaded workflow for {state_name}: {len(state.logic)} rules")
-                        except Exception as e:
-                            print(f"  Failed to load workflow {state.workflow}: {e}")
+            config = self._load_cache(game_path) if ".cache" in entries else None
+            if config is None:
+                config = self._parse_config(game_name, game_path, entries)
+                # Neither YAML nor pickle interns, so both paths do it
+                self._intern_names(config)
+                self._save_cache(config)
             
             # Load game-specific functions if available
-            game_funcs_path = game_path / "game_functions.py"
-            
-            # Check src directory (new centralized structure)
-            if not game_funcs_path.exists():
+            game_funcs_path = None
+            if "game_functions.py" in entries:
+                game_funcs_path = game_path / "game_functions.py"
+            else:
+                # Check src directory (new centralized structure)
                 project_root = Path(__file__).parent.parent.parent
                 central_path = project_root / "src" / "game_functions" / game_name / "game_functions.py"
+                legacy_path = game_path / "src" / "game_functions.py"
                 if central_path.exists():
                     game_funcs_path = central_path
+                # Legacy local support
+                elif "src" in entries and legacy_path.exists():
+                    game_funcs_path = legacy_path
             
-            # Legacy local support
-            if not game_funcs_path.exists():
-                game_funcs_path = game_path / "src" / "game_functions.py"
-            
-            if game_funcs_path.exists():
+            if game_funcs_path:
                 try:
-                    import importlib.util
-                    spec = importlib.util.spec_from_file_location(
-                        f"{game_name}_functions", 
-                        game_funcs_path
-                    )
-                    game_funcs_module = importlib.util.module_from_spec(spec)
-                    spec.loader.exec_module(game_funcs_module)
+                    key = (str(game_funcs_path.resolve()), game_funcs_path.stat().st_mtime_ns)
+                    game_funcs_module = self._module_cache.get(key)
+                    if game_funcs_module is None:
+                        import importlib.util
+                        spec = importlib.util.spec_from_file_location(
+                            f"{game_name}_functions", 
+                            game_funcs_path
+                        )
+                        game_funcs_module = importlib.util.module_from_spec(spec)
+                        spec.loader.exec_module(game_funcs_module)
+                        self._module_cache[key] = game_funcs_module
                     
                     # Create instance if factory function exists
                     if hasattr(game_funcs_module, 'create_game_functions'):
@@ -259,23 +247,224 @@ class GameLoader:
                     else:
                         config.game_functions = game_funcs_module
                     
-                    print(f"  Loaded game functions from {game_funcs_path.name}")
+                    log.info("  Loaded game functions from %s", game_funcs_path.name)
                 except Exception as e:
-                    print(f"  Failed to load game functions: {e}")
+                    log.warning("  Failed to load game functions: %s", e)
             
-            print(f"Loaded game: {config.name} v{config.version}")
-            print(f"  States: {list(config.states.keys())}")
-            print(f"  Targets: {list(config.targets.keys())}")
-            print(f"  Regions: {list(config.regions.keys())}")
-            print(f"  Colors: {list(config.colors.keys())}")
-            print(f"  Assets: {config.assets}")
+            if log.isEnabledFor(logging.INFO):
+                log.info(
+                    "Loaded game: %s v%s\n  States: %s\n  Targets: %s\n"
+                    "  Regions: %s\n  Colors: %s\n  Assets: %s",
+                    config.name, config.version, list(config.states), list(config.targets),
+                    list(config.regions), list(config.colors), config.assets
+                )
             
             return config
             
         except Exception as e:
-            print(f"Error loading game: {e}")
+            log.error("Error loading game: %s", e)
+            return None
+    
+    def _parse_config(self, game_name: str, game_path: Path,
+                      entries: Dict[str, os.DirEntry]) -> GameConfig:
+        """Build a GameConfig from the game's YAML files"""
+        main_yaml = game_path / "main.yaml"
+        
+        # Load main config
+        main = _yaml_load(main_yaml.read_bytes())
+        
+        config = GameConfig(
+            name=main.get("name", game_name),
+            version=main.get("version", "1.0"),
+            path=game_path,
+            initial_state=main.get("initial_state", "menu"),
+            polling_hz=main.get("polling_hz", 60),
+            screen_width=main.get("screen", {}).get("width", 1080),
+            screen_height=main.get("screen", {}).get("height", 2400)
+        )
+        
+        # Load states
+        for state_name, state_data in main.get("states", {}).items():
+            detect = state_data.get("detect", [])
+            if isinstance(detect, str):
+                detect = [detect]
+            on_found = state_data.get("on_found") or _EMPTY
+            
+            config.states[state_name] = GameState(
+                name=state_name,
+                detect=detect,
+                action=on_found.get("action", "NONE"),
+                target=on_found.get("target", ""),
+                next_state=on_found.get("next_state", ""),
+                timeout_ms=state_data.get("timeout_ms", 0),
+                on_timeout=state_data.get("on_timeout", ""),
+                workflow=state_data.get("workflow", ""),
+                exit_on=state_data.get("exit_on", [])
+            )
+        
+        # Read the remaining files concurrently; libyaml holds the GIL while
+        # building objects, so only the reads overlap and parsing stays here
+        locations_yaml = game_path / "locations.yaml"
+        colors_yaml = game_path / "colors.yaml"
+        workflow_paths = [game_path / state.workflow for state in config.states.values() if state.workflow]
+        raw = self._read_files([locations_yaml, colors_yaml, *workflow_paths])
+        
+        # Load locations
+        if raw[locations_yaml] is not None:
+            locations = _yaml_load(raw[locations_yaml])
+            
+            for name, data in locations.get("targets", {}).items():
+                config.targets[name] = TapTarget(name=name, **_fields(data, _TARGET_DEFAULTS))
+            
+            for name, data in locations.get("regions", {}).items():
+                config.regions[name] = Region(name=name, **_fields(data, _REGION_DEFAULTS))
+        
+        # Load colors
+        if raw[colors_yaml] is not None:
+            colors = _yaml_load(raw[colors_yaml])
+            
+            for name, data in colors.get("colors", {}).items():
+                fields = _fields(data, _COLOR_DEFAULTS)
+                fields["hsv_low"] = tuple(fields["hsv_low"])
+                fields["hsv_high"] = tuple(fields["hsv_high"])
+                config.colors[name] = ColorRange(name=name, **fields)
+        
+        # List assets
+        assets_dir = entries.get("assets")
+        if assets_dir is not None and assets_dir.is_dir():
+            with os.scandir(assets_dir.path) as assets:
+                config.assets = [e.name for e in assets if e.is_file()]
+        
+        # Load workflow files for states that reference them
+        for state_name, state in config.states.items():
+            if state.workflow:
+                workflow_path = game_path / state.workflow
+                if raw[workflow_path] is not None:
+                    try:
+                        workflow_data = _yaml_load(raw[workflow_path])
+                        
+                        # Update state with workflow data
+                        detect = workflow_data.get("detect", [])
+                        if isinstance(detect, str):
+                            detect = [detect]
+                        state.detect = detect
+                        state.polling_hz = workflow_data.get("polling_hz", 60)
+                        
+                        # Parse logic rules
+                        for rule_data in workflow_data.get("logic", []):
+                            rule = LogicRule(
+                                condition=rule_data.get("condition", "true"),
+                                action=rule_data.get("action", "WAIT"),
+                                priority=rule_data.get("priority", 0),
+                                target=rule_data.get("target", "")
+                            )
+                            state.logic.append(rule)
+                        
+                        # Sort logic by priority (highest first)
+                        state.logic.sort(key=attrgetter("priority"), reverse=True)
+                        
+                        log.info("  Loaded workflow for %s: %d rules", state_name, len(state.logic))
+                    except Exception as e:
+                        log.warning("  Failed to load workflow %s: %s", state.workflow, e)
+        
+        config.pack_arrays()
+        return config
+    
+    @staticmethod
+    def _intern_names(config: GameConfig) -> None:
+        """Intern the names the FSM keys dicts by and compares on every tick,
+        so lookups against code literals short-circuit on identity"""
+        intern = sys.intern
+        for state in config.states.values():
+            state.name = intern(state.name)
+            state.detect = [intern(name) for name in state.detect]
+            state.exit_on = [intern(name) for name in state.exit_on]
+            state.action = intern(state.action)
+            state.target = intern(state.target)
+            state.next_state = intern(state.next_state)
+            state.on_timeout = intern(state.on_timeout)
+            for rule in state.logic:
+                rule.condition = intern(rule.condition)
+                rule.action = intern(rule.action)
+                rule.target = intern(rule.target)
+        for items in (config.targets, config.regions, config.colors):
+            for item in items.values():
+                item.name = intern(item.name)
+        config.states = {intern(name): state for name, state in config.states.items()}
+        config.targets = {intern(name): target for name, target in config.targets.items()}
+        config.regions = {intern(name): region for name, region in config.regions.items()}
+        config.colors = {intern(name): color for name, color in config.colors.items()}
+        config.initial_state = intern(config.initial_state)
+        config.region_names = [intern(name) for name in config.region_names]
+        config.color_names = [intern(name) for name in config.color_names]
+    
+    @staticmethod
+    def _read_files(paths: List[Path]) -> Dict[Path, Optional[bytes]]:
+        """Read files concurrently; None for files that are missing or unreadable"""
+        def read(path: Path) -> Optional[bytes]:
+            try:
+                return path.read_bytes()
+            except FileNotFoundError:
+                return None
+            except OSError as e:
+                # A directory or unreadable file skips just that input
+                log.warning("  Failed to read %s: %s", path, e)
+                return None
+        
+        with ThreadPoolExecutor(max_workers=min(8, len(paths))) as pool:
+            return dict(zip(paths, pool.map(read, paths)))
+    
+    @staticmethod
+    def _cache_sources(config: GameConfig) -> List[str]:
+        """Files and directories (relative to the game) a parsed config was built from"""
+        sources = ["main.yaml", "locations.yaml", "colors.yaml", "assets"]
+        sources += [state.workflow for state in config.states.values() if state.workflow]
+        return sources
+    
+    @staticmethod
+    def _cache_stamp(game_path: Path, sources: List[str]) -> List[Tuple[str, int, int]]:
+        """mtime and size of each source; missing files stamp as -1 so creating one invalidates"""
+        stamp = []
+        for name in sources:
+            try:
+                st = (game_path / name).stat()
+                stamp.append((name, st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamp.append((name, -1, -1))
+        return stamp
+    
+    def _load_cache(self, game_path: Path) -> Optional[GameConfig]:
+        """Parsed config from the cache, if none of its sources changed since"""
+        try:
+            version, *entry = pickle.loads((game_path / CACHE_FILE).read_bytes())
+            if version != CACHE_VERSION:
+                return None
+            stamp, sources, config = entry
+            if stamp != self._cache_stamp(game_path, sources):
+                return None
+            config.path = game_path
+            # A config that doesn't fit the current code is a miss, not a failed load
+            self._intern_names(config)
+            return config
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.warning("  Ignoring config cache: %s", e)
             return None
     
+    def _save_cache(self, config: GameConfig) -> None:
+        """Pickle the parsed config with the stamp of its sources"""
+        cache_path = config.path / CACHE_FILE
+        try:
+            sources = self._cache_sources(config)
+            cache_path.parent.mkdir(exist_ok=True)
+            cache_path.write_bytes(pickle.dumps(
+                (CACHE_VERSION, self._cache_stamp(config.path, sources), sources, config),
+                protocol=pickle.HIGHEST_PROTOCOL
+            ))
+        except Exception as e:
+            log.warning("  Failed to write config cache: %s", e)
+    
     def save_locations(self, config: GameConfig) -> bool:
         """Save locations.yaml"""
         try:
@@ -300,19 +489,19 @@ class GameLoader:
                     "description": region.description
                 }
             
+            yaml, _, dumper = _yaml_codecs()
             with open(config.path / "locations.yaml", "w") as f:
-                yaml.dump(data, f, default_flow_style=False)
+                yaml.dump(data, f, Dumper=dumper, default_flow_style=False)
             
             return True
         except Exception as e:
-            print(f"Error saving locations: {e}")
+            log.error("Error saving locations: %s", e)
             return False
     
     def save_asset(self, config: GameConfig, name: str, image_data) -> bool:
         """Save asset image"""
         try:
             from PIL import Image
-            import numpy as np
             
             assets_dir = config.path / "assets"
             assets_dir.mkdir(exist_ok=True)
@@ -330,5 +519,5 @@ class GameLoader:
             
             return True
         except Exception as e:
-            print(f"Error saving asset: {e}")
+            log.error("Error saving asset: %s", e)
             return False
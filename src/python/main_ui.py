@@ -3,28 +3,41 @@ RashPlayer-C: Main UI
 PySide6 desktop application with OpenGL device preview
 """
 
+import os
 import sys
 import time
+import threading
+import ctypes
 import numpy as np
+import cv2
 from pathlib import Path
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QComboBox, QLabel, QGroupBox, QFileDialog,
     QStatusBar, QFrame, QSlider, QSpinBox, QTabWidget
 )
-from PySide6.QtCore import Qt, QTimer, Signal, QThread
+from PySide6.QtCore import Qt, QTimer, Signal, Slot, QThread
 from PySide6.QtGui import QImage, QPixmap
 from PySide6.QtOpenGLWidgets import QOpenGLWidget
+import OpenGL
+# Skip PyOpenGL's glGetError round trip after every call; must be set
+# before OpenGL.GL is imported
+OpenGL.ERROR_CHECKING = False
 from OpenGL.GL import (
-    glClearColor, glEnable, glGenTextures, glBindTexture, glTexParameteri,
-    glClear, glTexImage2D, glBegin, glTexCoord2f, glVertex2f, glEnd,
-    GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR, GL_TEXTURE_MAG_FILTER,
-    GL_COLOR_BUFFER_BIT, GL_RGBA, GL_UNSIGNED_BYTE, GL_QUADS
+    glClearColor, glEnable, glGenTextures, glDeleteTextures, glBindTexture, glTexParameteri,
+    glTexStorage2D, GL_RGBA8,
+    glClear, glTexImage2D, glTexSubImage2D, glPixelStorei, glGenBuffers, glBindBuffer,
+    glBufferData, glBufferSubData, glMapBufferRange, glUnmapBuffer, glEnableClientState,
+    glVertexPointer, glTexCoordPointer, glDrawArrays, GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER,
+    GL_LINEAR, GL_TEXTURE_MAG_FILTER, GL_COLOR_BUFFER_BIT, GL_RGBA, GL_UNSIGNED_BYTE,
+    GL_ARRAY_BUFFER, GL_DYNAMIC_DRAW, GL_FLOAT, GL_VERTEX_ARRAY, GL_TEXTURE_COORD_ARRAY,
+    GL_TRIANGLE_STRIP, GL_UNPACK_ALIGNMENT, GL_UNPACK_ROW_LENGTH, GL_PIXEL_UNPACK_BUFFER,
+    GL_STREAM_DRAW, GL_MAP_WRITE_BIT, GL_MAP_INVALIDATE_BUFFER_BIT, GL_MAP_UNSYNCHRONIZED_BIT
 )
 
 from device_manager import DeviceManager, DeviceInterface
 from gesture_executor import GestureExecutor
-from shared_bridge import SharedMemoryBridge, GameState
+from shared_bridge import SharedMemoryBridge, GameState, ActionType as BridgeActionType
 from yaml_parser import YAMLParser, WorkflowConfig
 from capture_manager import CaptureManager
 from detection_overlay import DetectionOverlay
@@ -36,80 +49,252 @@ from fsm_engine import FSMEngine, FSMState, FSMAction, ActionType
 class DevicePreviewWidget(QOpenGLWidget):
     """OpenGL widget for real-time device preview"""
     
+    PBO_MAP_FLAGS = GL_MAP_WRITE_BIT | GL_MAP_INVALIDATE_BUFFER_BIT | GL_MAP_UNSYNCHRONIZED_BIT
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self._texture_id = 0
         self._frame: np.ndarray | None = None
         self._frame_width = 1920
         self._frame_height = 1080
+        # Size the texture storage was last allocated at
+        self._tex_w = 0
+        self._tex_h = 0
+        self._tex_immutable = False
+        # Stream size declared by lock_resolution; gets immutable storage
+        self._locked_size: tuple[int, int] | None = None
+        # Quad scale, recomputed only when the widget or frame size changes
+        self._widget_aspect = 1.0
+        self._scale_x = 1.0
+        self._scale_y = 1.0
+        # Interleaved x, y, u, v triangle strip; re-sent to the VBO when dirty
+        self._quad = np.zeros((4, 4), dtype=np.float32)
+        self._quad_vbo = 0
+        self._quad_dirty = True
+        # Ping-pong pixel unpack buffers; None when the context can't map buffers
+        self._pbos: list | None = None
+        self._pbo_index = 0
+        # Frames received vs. frame last uploaded; repaints for resize and
+        # expose events reuse the texture
+        self._frame_seq = 0
+        self._uploaded_seq = -1
+        # RGBA8 copy target for frames in any other layout
+        self._frame_buf: np.ndarray | None = None
+        self._layout_warned = False
+        # A repaint is queued and not yet swapped; newer frames just replace
+        # self._frame so at most one paint per vsync shows the latest
+        self._pending = False
+        self.frameSwapped.connect(self._on_swap)
         self.setMinimumSize(480, 270)
     
     def initializeGL(self):
         glClearColor(0.1, 0.1, 0.1, 1.0)
         glEnable(GL_TEXTURE_2D)
+        self._new_texture()
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        self._tex_w = self._tex_h = 0
+        self._tex_immutable = False
+        self._uploaded_seq = -1
+        self._pbos = list(glGenBuffers(2)) if bool(glMapBufferRange) else None
+        
+        # The vertex/texcoord pointers reference the VBO, so they are set
+        # once here and paintGL only issues the draw
+        self._quad_vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self._quad_vbo)
+        glBufferData(GL_ARRAY_BUFFER, self._quad.nbytes, None, GL_DYNAMIC_DRAW)
+        stride = self._quad.strides[0]
+        glVertexPointer(2, GL_FLOAT, stride, ctypes.c_void_p(0))
+        glTexCoordPointer(2, GL_FLOAT, stride, ctypes.c_void_p(2 * self._quad.itemsize))
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        self._quad_dirty = True
+    
+    def lock_resolution(self, w: int, h: int):
+        """Declare the stream's fixed frame size: the quad scale is settled up
+        front and frames of this size go to immutable texture storage"""
+        self._locked_size = (w, h)
+        self._frame_width, self._frame_height = w, h
+        self._recompute_scale()
+        self._tex_w = self._tex_h = 0  # Reallocate on the next upload
+    
+    def _new_texture(self):
         self._texture_id = glGenTextures(1)
-        
         glBindTexture(GL_TEXTURE_2D, self._texture_id)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
     
+    def _allocate_texture(self, w: int, h: int):
+        """(Re)allocate texture storage for w x h frames"""
+        immutable = (w, h) == self._locked_size and bool(glTexStorage2D)
+        if immutable or self._tex_immutable:
+            # Immutable storage can't be respecified; start from a fresh texture
+            glDeleteTextures([self._texture_id])
+            self._new_texture()
+        if immutable:
+            glTexStorage2D(GL_TEXTURE_2D, 1, GL_RGBA8, w, h)
+        else:
+            glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, w, h, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+        self._tex_immutable = immutable
+        self._tex_w, self._tex_h = w, h
+    
+    def _upload_frame(self):
+        """Copy the frame into the texture, reallocating storage only on resize"""
+        w, h = self._frame_width, self._frame_height
+        if (w, h) != (self._tex_w, self._tex_h):
+            self._allocate_texture(w, h)
+            if self._pbos:
+                for pbo in self._pbos:
+                    glBindBuffer(GL_PIXEL_UNPACK_BUFFER, pbo)
+                    glBufferData(GL_PIXEL_UNPACK_BUFFER, w * h * 4, None, GL_STREAM_DRAW)
+                glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0)
+        
+        if self._pbos:
+            self._upload_via_pbo(w, h)
+            return
+        
+        # Row-padded views (crops, stride-aligned captures) upload in place
+        # by telling GL the row pitch and passing the raw pointer
+        frame = self._frame
+        if frame.strides[1:] != (4, 1):
+            frame = np.ascontiguousarray(frame)
+        glPixelStorei(GL_UNPACK_ROW_LENGTH, frame.strides[0] // 4)
+        glTexSubImage2D(
+            GL_TEXTURE_2D, 0, 0, 0, w, h,
+            GL_RGBA, GL_UNSIGNED_BYTE, ctypes.c_void_p(frame.ctypes.data)
+        )
+        glPixelStorei(GL_UNPACK_ROW_LENGTH, 0)
+    
+    def _upload_via_pbo(self, w: int, h: int):
+        """Stage the frame in the next PBO; the driver DMAs it into the texture
+        while the other buffer may still be in flight"""
+        self._pbo_index ^= 1
+        size = w * h * 4
+        glBindBuffer(GL_PIXEL_UNPACK_BUFFER, self._pbos[self._pbo_index])
+        ptr = glMapBufferRange(GL_PIXEL_UNPACK_BUFFER, 0, size, self.PBO_MAP_FLAGS)
+        if ptr:
+            staging = np.ctypeslib.as_array((ctypes.c_ubyte * size).from_address(ptr))
+            np.copyto(staging.reshape(h, w, 4), self._frame)
+            glUnmapBuffer(GL_PIXEL_UNPACK_BUFFER)
+            # With an unpack buffer bound the data argument is an offset into it
+            glTexSubImage2D(
+                GL_TEXTURE_2D, 0, 0, 0, w, h,
+                GL_RGBA, GL_UNSIGNED_BYTE, ctypes.c_void_p(0)
+            )
+        glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0)
+    
+    def resizeGL(self, w: int, h: int):
+        self._widget_aspect = w / h if h > 0 else 1.0
+        self._recompute_scale()
+    
+    def _recompute_scale(self):
+        """Quad half-extents that keep the frame's aspect ratio in the widget"""
+        widget_aspect = self._widget_aspect
+        frame_aspect = self._frame_width / self._frame_height if self._frame_height > 0 else 1.0
+        if frame_aspect > widget_aspect:
+            # Frame is wider - fit to width, add letterboxing top/bottom
+            self._scale_x = 1.0
+            self._scale_y = widget_aspect / frame_aspect
+        else:
+            # Frame is taller - fit to height, add pillarboxing left/right
+            self._scale_x = frame_aspect / widget_aspect
+            self._scale_y = 1.0
+        
+        # Corners in strip order; v is flipped because frames are top-down
+        sx, sy = self._scale_x, self._scale_y
+        self._quad[:] = (
+            (-sx, -sy, 0.0, 1.0),
+            (sx, -sy, 1.0, 1.0),
+            (-sx, sy, 0.0, 0.0),
+            (sx, sy, 1.0, 0.0),
+        )
+        self._quad_dirty = True
+    
     def paintGL(self):
         glClear(GL_COLOR_BUFFER_BIT)
         
-        if self._frame is not None:
+        if self._frame is not None and self._frame_seq != self._uploaded_seq:
             glBindTexture(GL_TEXTURE_2D, self._texture_id)
-            glTexImage2D(
-                GL_TEXTURE_2D, 0, GL_RGBA,
-                self._frame_width, self._frame_height, 0,
-                GL_RGBA, GL_UNSIGNED_BYTE, self._frame
-            )
-            
-            # Calculate aspect ratio preserving coordinates
-            widget_width = self.width()
-            widget_height = self.height()
-            widget_aspect = widget_width / widget_height if widget_height > 0 else 1.0
-            frame_aspect = self._frame_width / self._frame_height if self._frame_height > 0 else 1.0
-            
-            # Calculate viewport coordinates to maintain aspect ratio
-            if frame_aspect > widget_aspect:
-                # Frame is wider - fit to width, add letterboxing top/bottom
-                scale_x = 1.0
-                scale_y = widget_aspect / frame_aspect
-            else:
-                # Frame is taller - fit to height, add pillarboxing left/right
-                scale_x = frame_aspect / widget_aspect
-                scale_y = 1.0
+            self._upload_frame()
+            self._uploaded_seq = self._frame_seq
+            # The texture holds the pixels now; don't pin the capture buffer
+            self._frame = None
+        
+        if self._uploaded_seq >= 0:
+            glBindTexture(GL_TEXTURE_2D, self._texture_id)
+            if self._quad_dirty:
+                # _recompute_scale can run outside the GL context, so the
+                # upload waits for the next paint
+                glBindBuffer(GL_ARRAY_BUFFER, self._quad_vbo)
+                glBufferSubData(GL_ARRAY_BUFFER, 0, self._quad.nbytes, self._quad)
+                glBindBuffer(GL_ARRAY_BUFFER, 0)
+                self._quad_dirty = False
             
             # Draw quad with proper aspect ratio
-            glBegin(GL_QUADS)
-            glTexCoord2f(0, 1)
-            glVertex2f(-scale_x, -scale_y)
-            glTexCoord2f(1, 1)
-            glVertex2f(scale_x, -scale_y)
-            glTexCoord2f(1, 0)
-            glVertex2f(scale_x, scale_y)
-            glTexCoord2f(0, 0)
-            glVertex2f(-scale_x, scale_y)
-            glEnd()
+            glDrawArrays(GL_TRIANGLE_STRIP, 0, 4)
     
     def update_frame(self, frame: np.ndarray):
+        # Uploads take RGBA8 rows as-is (row padding is fine); anything else
+        # goes through one reused buffer instead of a fresh copy per frame
+        if frame.dtype != np.uint8 or frame.ndim != 3 or frame.shape[2] != 4 or frame.strides[1:] != (4, 1):
+            if not self._layout_warned:
+                print(f"Preview frame is {frame.dtype} {frame.shape} strides {frame.strides}; copying to RGBA8")
+                self._layout_warned = True
+            h, w = frame.shape[:2]
+            if self._frame_buf is None or self._frame_buf.shape[:2] != (h, w):
+                self._frame_buf = np.full((h, w, 4), 255, dtype=np.uint8)
+            if frame.dtype == np.uint8 and frame.ndim == 3 and frame.shape[2] == 3:
+                # Common case (RGB captures): one fused SIMD pass, alpha included
+                cv2.cvtColor(frame, cv2.COLOR_RGB2RGBA, dst=self._frame_buf)
+            elif frame.ndim == 2:
+                np.copyto(self._frame_buf[..., :3], frame[..., None], casting="unsafe")
+            else:
+                np.copyto(self._frame_buf[..., :min(frame.shape[2], 4)], frame[..., :4], casting="unsafe")
+            frame = self._frame_buf
         self._frame = frame
-        self._frame_height, self._frame_width = frame.shape[:2]
-        self.update()
+        h, w = frame.shape[:2]
+        if (w, h) != (self._frame_width, self._frame_height):
+            self._frame_width, self._frame_height = w, h
+            self._recompute_scale()
+        self._frame_seq += 1
+        if not self._pending:
+            self._pending = True
+            self.update()
+    
+    def _on_swap(self):
+        self._pending = False
+
+
+def pin_current_thread(cores: set[int] | None) -> None:
+    """Restrict the calling thread to the given CPU cores; None leaves it floating"""
+    if not cores:
+        return
+    try:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cores)  # pid 0 is the calling thread
+        elif sys.platform == "win32":
+            kernel32 = ctypes.windll.kernel32
+            kernel32.GetCurrentThread.restype = ctypes.c_void_p
+            kernel32.SetThreadAffinityMask.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+            kernel32.SetThreadAffinityMask(kernel32.GetCurrentThread(), sum(1 << c for c in cores))
+    except OSError as e:
+        print(f"Failed to pin thread to cores {sorted(cores)}: {e}")
 
 
 class PreviewThread(QThread):
     """Background thread for device preview only (no processing)"""
     
-    frame_captured = Signal(np.ndarray)
+    frame_captured = Signal(object)
     
     def __init__(self, device: DeviceInterface):
         super().__init__()
         self.device = device
-        self.running = False
+        self._stop_event = threading.Event()
+        # Tuning knob: cores for this thread, e.g. {2}; unpinned by default
+        self.cpu_affinity: set[int] | None = None
     
     def run(self):
-        self.running = True
+        pin_current_thread(self.cpu_affinity)
         
         def on_frame(frame: np.ndarray):
             try:
@@ -125,35 +310,41 @@ class PreviewThread(QThread):
             print(f"Failed to start capture: {e}")
             return
         
-        while self.running:
-            time.sleep(0.016)  # Just keep thread alive
+        # Park until stop(); frames arrive on the device's own thread
+        self._stop_event.wait()
         
         self.device.stop_capture()
     
     def stop(self):
-        self.running = False
+        self._stop_event.set()
         self.wait()
 
 
 class ProcessingThread(QThread):
     """Background thread for C-Core processing loop (uses shared capture)"""
     
-    results_ready = Signal(list, object, tuple)
+    results_ready = Signal(object, object, tuple)
     overlay_updated = Signal(object)  # DetectionOverlay state
     
+    OVERLAY_INTERVAL_NS = 100_000_000  # Between overlay_updated emits
+    FPS_SMOOTHING = 0.1  # EWMA weight of the newest result interval
+    
     def __init__(self, bridge: SharedMemoryBridge, capture_manager: CaptureManager):
         super().__init__()
         self.bridge = bridge
         self.capture_manager = capture_manager
         self.overlay = DetectionOverlay()
         self.running = False
-        self.polling_hz = 60
+        # Longest wait for a result before re-checking self.running
+        self.wait_timeout = 0.05
+        # Tuning knob: cores for this thread, e.g. {3}; unpinned by default
+        self.cpu_affinity: set[int] | None = None
     
     def run(self):
+        pin_current_thread(self.cpu_affinity)
         self.running = True
-        interval = 1.0 / self.polling_hz
-        frame_count = 0
-        start_time = time.time()
+        fps = 0.0
+        last_result = last_overlay = time.monotonic_ns()
         
         # Register callback with shared capture manager
         def on_frame(frame: np.ndarray):
@@ -162,26 +353,30 @@ class ProcessingThread(QThread):
         self.capture_manager.add_callback(on_frame)
         self.overlay.set_fsm_state("RUNNING")
         
+        # Sleep on the bridge's result semaphore instead of polling; a
+        # timeout still checks result_ready, so a C-Core that never posts
+        # is polled at wait_timeout instead
         while self.running:
-            loop_start = time.time()
-            
+            self.bridge.wait_results(self.wait_timeout)
             ready, results, action = self.bridge.read_results()
             if ready:
                 latency = self.bridge.get_latency()
                 self.results_ready.emit(results, action, latency)
                 
-                # Update overlay with detection results
-                self.overlay.set_metrics(
-                    fps=frame_count / (time.time() - start_time + 0.001),
-                    latency_ms=latency[0] if latency else 0
-                )
-                self.overlay_updated.emit(self.overlay.get_state())
-            
-            frame_count += 1
-            
-            elapsed = time.time() - loop_start
-            if elapsed < interval:
-                time.sleep(interval - elapsed)
+                now = time.monotonic_ns()
+                dt_ns = now - last_result
+                last_result = now
+                if dt_ns > 0:
+                    fps += self.FPS_SMOOTHING * (1e9 / dt_ns - fps)
+                
+                # Overlay only needs a human-readable refresh rate
+                if now - last_overlay >= self.OVERLAY_INTERVAL_NS:
+                    last_overlay = now
+                    self.overlay.set_metrics(
+                        fps=fps,
+                        latency_ms=latency[0] if latency else 0
+                    )
+                    self.overlay_updated.emit(self.overlay.get_state())
         
         self.capture_manager.remove_callback(on_frame)
         self.overlay.set_fsm_state("STOPPED")
@@ -194,6 +389,10 @@ class ProcessingThread(QThread):
 class MainWindow(QMainWindow):
     """Main application window"""
     
+    # Emitted from the capture thread and delivered queued on the GUI
+    # thread; every capture is a fresh array, so it is passed as is
+    frame_ready = Signal(object)
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle("RashPlayer-C - Mobile Automation")
@@ -205,6 +404,7 @@ class MainWindow(QMainWindow):
         self.workflow: WorkflowConfig | None = None
         self.capture_manager: CaptureManager | None = None
         self.processing_thread: ProcessingThread | None = None
+        self.preview_thread: PreviewThread | None = None
         self.game_loader = GameLoader()
         self.game_config: GameConfig | None = None
         self.fsm_engine: FSMEngine | None = None
@@ -332,6 +532,7 @@ class MainWindow(QMainWindow):
         self.start_btn.clicked.connect(self._start_fsm)
         self.stop_btn.clicked.connect(self._stop_fsm)
         self.device_combo.currentIndexChanged.connect(self._on_device_selected)
+        self.frame_ready.connect(self._show_frame)
         
         # Initial game list refresh
         QTimer.singleShot(200, self._refresh_games)
@@ -369,6 +570,7 @@ class MainWindow(QMainWindow):
             self.gesture_executor = GestureExecutor(device)
             self.start_btn.setEnabled(True)
             self.statusBar.showMessage(f"Connected to {serial}")
+            self.preview_widget.lock_resolution(*device.get_resolution())
             
             # Create shared memory
             if not self.bridge.create():
@@ -376,8 +578,7 @@ class MainWindow(QMainWindow):
             
             # Start capture manager (shared between preview and processing)
             self.capture_manager = CaptureManager(device)
-            self.capture_manager.add_callback(self.preview_widget.update_frame)
-            self.capture_manager.add_callback(self.scanner_widget.update_frame)
+            self.capture_manager.add_callback(self._on_capture_frame)
             
             if self.capture_manager.start():
                 self.statusBar.showMessage(f"Connected to {serial} - Live preview active")
@@ -386,6 +587,15 @@ class MainWindow(QMainWindow):
         else:
             self.statusBar.showMessage(f"Failed to connect to {serial}")
     
+    def _on_capture_frame(self, frame: np.ndarray):
+        """Capture thread: hand the frame to the GUI thread"""
+        self.frame_ready.emit(frame)
+    
+    @Slot(object)
+    def _show_frame(self, frame: np.ndarray):
+        self.preview_widget.update_frame(frame)
+        self.scanner_widget.update_frame(frame)
+    
     def _refresh_games(self):
         """Refresh game list"""
         self.game_combo.clear()
@@ -470,10 +680,11 @@ class MainWindow(QMainWindow):
         state = self.bridge.get_state()
         self.state_label.setText(f"State: {state.name}")
         
-        # Execute action if pending
-        if action and self.gesture_executor:
-            if action.action_type.TAP:
-                self.gesture_executor.tap(action.start[0], action.start[1])
+        # Execute action if pending; the bridge reports C-Core's action enum,
+        # not the FSM's
+        executor = self.gesture_executor
+        if action is not None and executor is not None and action.action_type == BridgeActionType.TAP:
+            executor.tap(action.start[0], action.start[1])
     
     def closeEvent(self, event):
         self._stop_processing()
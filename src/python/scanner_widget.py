@@ -5,14 +5,17 @@ Interactive tool for defining screen elements with detection overlay
 
 import numpy as np
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Iterable, Optional, Tuple
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
-    QComboBox, QGroupBox, QListWidget, QListWidgetItem,
+    QComboBox, QGroupBox, QListWidget,
     QSplitter, QFrame, QInputDialog, QMessageBox
 )
-from PySide6.QtCore import Qt, Signal, QPoint, QRect
-from PySide6.QtGui import QPainter, QColor, QPen, QBrush, QFont, QMouseEvent
+from PySide6.QtCore import Qt, Signal, QPoint, QRect, QLine, QTimer
+from PySide6.QtGui import (
+    QPainter, QPainterPath, QColor, QPen, QBrush, QFont, QFontMetrics, QMouseEvent,
+    QImage, QPixmap, QRegion, QStaticText
+)
 
 from game_loader import GameLoader, GameConfig, TapTarget, Region
 
@@ -25,7 +28,16 @@ class ScannerPreview(QWidget):
     
     def __init__(self, parent=None):
         super().__init__(parent)
+        # Newest frame as handed over (captures are fresh arrays, never
+        # rewritten); converted to _pixmap only when a paint needs it, so
+        # a hidden scanner costs nothing per frame
         self._frame: Optional[np.ndarray] = None
+        self._frame_seq = 0
+        self._pixmap: Optional[QPixmap] = None
+        self._pixmap_seq = 0
+        # Regions, targets, labels and state text pre-rendered over a
+        # transparent background; None when any of them changed
+        self._overlay_layer: Optional[QPixmap] = None
         self._frame_width = 1080
         self._frame_height = 2400
         
@@ -41,10 +53,46 @@ class ScannerPreview(QWidget):
         self._scale_y = 1.0
         
         # Overlay data
-        self._regions: list = []
-        self._targets: list = []
+        self._regions: tuple = ()
+        self._targets: tuple = ()
+        # Widget-space geometry of the overlay, parallel to _regions/_targets;
+        # rebuilt when the overlay or the display geometry changes
+        self._region_rects: list = []  # (x, y, w, h)
+        self._target_points: list = []  # (x, y)
+        # The same geometry as Qt primitives for one batched draw call each
+        self._region_qrects: list = []
+        self._target_lines: list = []
+        self._target_rings = QPainterPath()
+        
+        # Painter state, built once rather than per element per repaint
+        self._background = QColor(30, 30, 30)
+        self._region_pen = QPen(QColor(0, 255, 0, 200), 2)
+        self._region_brush = QBrush(QColor(0, 255, 0, 30))
+        self._region_label_pen = QPen(QColor(0, 255, 0))
+        self._target_pen = QPen(QColor(0, 150, 255), 2)
+        self._sel_region_pen = QPen(QColor(255, 255, 0), 2, Qt.DashLine)
+        self._sel_region_brush = QBrush(QColor(255, 255, 0, 40))
+        self._sel_tap_pen = QPen(QColor(0, 150, 255), 2, Qt.DashLine)
+        self._state_pen = QPen(QColor(255, 255, 0))
+        self._mode_pens = {"region": QPen(QColor(0, 255, 0)), "tap": QPen(QColor(0, 150, 255))}
+        self._label_font = QFont("Arial", 10)
+        self._label_metrics = QFontMetrics(self._label_font)
+        # Laid-out label glyphs by name, and per element (top-left, text)
+        # so repaints only rasterize
+        self._label_cache: dict[str, QStaticText] = {}
+        self._region_labels: list = []
+        self._target_labels: list = []
+        self._state_font = QFont("Arial", 14, QFont.Bold)
         self._current_state = "IDLE"
         
+        # Pointer samples can outpace the display several times over; moves
+        # only grow the dirty area and one zero-delay shot repaints it
+        self._sel_dirty: Optional[QRect] = None
+        self._repaint_timer = QTimer(self)
+        self._repaint_timer.setSingleShot(True)
+        self._repaint_timer.setInterval(0)
+        self._repaint_timer.timeout.connect(self._flush_selection)
+        
         self.setMouseTracking(True)
         self.setMinimumSize(200, 200)
     
@@ -52,6 +100,7 @@ class ScannerPreview(QWidget):
         """Calculate display geometry to maintain aspect ratio"""
         if self._frame is None:
             self._target_rect = self.rect()
+            self._recompute_overlay_cache()
             return
 
         w_w = self.width()
@@ -80,31 +129,82 @@ class ScannerPreview(QWidget):
         self._target_rect = QRect(x, y, d_w, d_h)
         self._scale_x = d_w / f_w
         self._scale_y = d_h / f_h
+        self._recompute_overlay_cache()
+    
+    def _recompute_overlay_cache(self):
+        """Map every region and target to widget coordinates in one pass"""
+        scale = np.array([self._scale_x, self._scale_y])
+        offset = np.array([self._target_rect.x(), self._target_rect.y()])
+        
+        xywh = np.array([(r.x, r.y, r.width, r.height) for r in self._regions], dtype=np.float64).reshape(-1, 4)
+        rects = np.empty(xywh.shape, dtype=np.int32)
+        rects[:, :2] = xywh[:, :2] * scale + offset
+        rects[:, 2:] = xywh[:, 2:] * scale
+        self._region_rects = rects.tolist()
+        
+        xy = np.array([(t.x, t.y) for t in self._targets], dtype=np.float64).reshape(-1, 2)
+        self._target_points = (xy * scale + offset).astype(np.int32).tolist()
+        
+        self._region_qrects = [QRect(*rect) for rect in self._region_rects]
+        self._region_labels = [
+            self._label_at(region.name, wx + 5, wy + 15)
+            for region, (wx, wy, _, _) in zip(self._regions, self._region_rects)
+        ]
+        self._target_labels = [
+            self._label_at(target.name, wx + 12, wy - 5)
+            for target, (wx, wy) in zip(self._targets, self._target_points)
+        ]
+        self._target_lines = []
+        self._target_rings = QPainterPath()
+        for wx, wy in self._target_points:
+            self._target_lines += (QLine(wx - 15, wy, wx + 15, wy), QLine(wx, wy - 15, wx, wy + 15))
+            self._target_rings.addEllipse(wx - 8, wy - 8, 16, 16)
 
+    def _invalidate_overlay(self):
+        self._overlay_layer = None
+        self.update()
+    
     def resizeEvent(self, event):
         super().resizeEvent(event)
         self._update_geometry()
+        self._overlay_layer = None
     
     def set_mode(self, mode: str):
         """Set selection mode: 'region' or 'tap'"""
         self._mode = mode
+        self._invalidate_overlay()
     
     def set_state(self, state: str):
         """Set current FSM state for display"""
         self._current_state = state
+        self._invalidate_overlay()
     
     def update_frame(self, frame: np.ndarray):
         """Update preview frame"""
+        first = self._frame is None
         self._frame = frame
-        self._frame_height, self._frame_width = frame.shape[:2]
-        self._update_geometry()
+        self._frame_seq += 1
+        h, w = frame.shape[:2]
+        if first or (w, h) != (self._frame_width, self._frame_height):
+            self._frame_height, self._frame_width = h, w
+            self._update_geometry()
         self.update()
     
-    def set_overlay_data(self, regions: list, targets: list):
+    def _label_at(self, name: str, x: int, baseline: int) -> Tuple[QPoint, QStaticText]:
+        """Cached static text for a label drawn at (x, baseline), as drawText would"""
+        text = self._label_cache.get(name)
+        if text is None:
+            text = self._label_cache[name] = QStaticText(name)
+            text.prepare(font=self._label_font)
+        return QPoint(x, baseline - self._label_metrics.ascent()), text
+    
+    def set_overlay_data(self, regions: Iterable, targets: Iterable):
         """Set regions and targets to draw"""
-        self._regions = regions
-        self._targets = targets
-        self.update()
+        self._regions = tuple(regions)
+        self._targets = tuple(targets)
+        self._label_cache.clear()
+        self._recompute_overlay_cache()
+        self._invalidate_overlay()
     
     def _widget_to_frame(self, pos: QPoint) -> Tuple[int, int]:
         """Convert widget coordinates to frame coordinates"""
@@ -128,8 +228,18 @@ class ScannerPreview(QWidget):
     
     def mouseMoveEvent(self, event: QMouseEvent):
         if self._selecting and self._selection_start:
-            self._selection_rect = QRect(self._selection_start, event.pos()).normalized()
-            self.update()
+            # Repaint only where the rubber band was and now is (plus the pen)
+            new_rect = QRect(self._selection_start, event.pos()).normalized()
+            dirty = new_rect.united(self._selection_rect) if self._selection_rect else new_rect
+            self._selection_rect = new_rect
+            self._sel_dirty = dirty.united(self._sel_dirty) if self._sel_dirty else dirty
+            if not self._repaint_timer.isActive():
+                self._repaint_timer.start()
+    
+    def _flush_selection(self):
+        if self._sel_dirty is not None:
+            self.update(self._sel_dirty.adjusted(-2, -2, 2, 2))
+            self._sel_dirty = None
     
     def mouseReleaseEvent(self, event: QMouseEvent):
         if event.button() == Qt.LeftButton and self._selecting:
@@ -156,66 +266,88 @@ class ScannerPreview(QWidget):
             self._selection_rect = None
             self.update()
     
+    def _convert_frame(self):
+        """Turn the newest frame into the pixmap paints draw from"""
+        frame = self._frame
+        h, w = frame.shape[:2]
+        # Captures are opaque; RGBX lets Qt swizzle straight to its native
+        # RGB32 without a premultiply pass
+        fmt = QImage.Format_RGBX8888 if frame.shape[2] == 4 else QImage.Format_RGB888
+        self._pixmap = QPixmap.fromImage(QImage(frame.data, w, h, frame.strides[0], fmt))
+        self._pixmap_seq = self._frame_seq
+    
+    def _rebuild_overlay(self):
+        """Render regions, targets, labels and state text into a transparent layer"""
+        dpr = self.devicePixelRatioF()
+        self._overlay_layer = QPixmap(self.size() * dpr)
+        self._overlay_layer.setDevicePixelRatio(dpr)
+        self._overlay_layer.fill(Qt.transparent)
+        
+        with QPainter(self._overlay_layer) as painter:
+            # Shapes go out in one call per kind
+            painter.setFont(self._label_font)
+            
+            # Draw regions (green boxes)
+            if self._region_qrects:
+                painter.setPen(self._region_pen)
+                painter.setBrush(self._region_brush)
+                painter.drawRects(self._region_qrects)
+            
+            # Labels
+            painter.setPen(self._region_label_pen)
+            for pos, text in self._region_labels:
+                painter.drawStaticText(pos, text)
+            
+            # Draw tap targets (blue crosshairs); antialiasing only for the
+            # rings, everything else is axis-aligned and would just pay for
+            # the wider fill
+            painter.setPen(self._target_pen)
+            if self._target_lines:
+                painter.drawLines(self._target_lines)
+                painter.setRenderHint(QPainter.Antialiasing, True)
+                painter.drawPath(self._target_rings)
+                painter.setRenderHint(QPainter.Antialiasing, False)
+            
+            # Labels
+            for pos, text in self._target_labels:
+                painter.drawStaticText(pos, text)
+            
+            # Draw state label
+            painter.setPen(self._state_pen)
+            painter.setFont(self._state_font)
+            painter.drawText(10, 25, f"State: {self._current_state}")
+            
+            # Draw mode indicator
+            painter.setPen(self._mode_pens["region" if self._mode == "region" else "tap"])
+            painter.drawText(10, 45, f"Mode: {self._mode.upper()}")
+    
     def paintEvent(self, event):
+        # Frames draw straight to the widget; the overlay is re-rendered
+        # only when its content changes and is blitted on top
+        if self._overlay_layer is None:
+            self._rebuild_overlay()
+        
         with QPainter(self) as painter:
-            painter.setRenderHint(QPainter.Antialiasing)
-            
-            # Draw frame
+            # Draw frame, filling only the letterbox bars around it
             if self._frame is not None:
-                from PySide6.QtGui import QImage, QPixmap
-                h, w = self._frame.shape[:2]
-                fmt = QImage.Format_RGBA8888 if self._frame.shape[2] == 4 else QImage.Format_RGB888
-                qimg = QImage(self._frame.data, w, h, self._frame.strides[0], fmt)
-                pixmap = QPixmap.fromImage(qimg)
-                painter.drawPixmap(self._target_rect, pixmap)
+                if self._pixmap_seq != self._frame_seq:
+                    self._convert_frame()
+                for bar in QRegion(self.rect()).subtracted(QRegion(self._target_rect)):
+                    painter.fillRect(bar, self._background)
+                painter.drawPixmap(self._target_rect, self._pixmap)
             else:
-                painter.fillRect(self.rect(), QColor(30, 30, 30))
+                painter.fillRect(self.rect(), self._background)
             
-            # Draw regions (green boxes)
-            for region in self._regions:
-                wx, wy = self._frame_to_widget(region.x, region.y)
-                ww = int(region.width * self._scale_x)
-                wh = int(region.height * self._scale_y)
-                
-                painter.setPen(QPen(QColor(0, 255, 0, 200), 2))
-                painter.setBrush(QBrush(QColor(0, 255, 0, 30)))
-                painter.drawRect(wx, wy, ww, wh)
-                
-                # Label
-                painter.setPen(QPen(QColor(0, 255, 0)))
-                painter.setFont(QFont("Arial", 10))
-                painter.drawText(wx + 5, wy + 15, region.name)
-            
-            # Draw tap targets (blue crosshairs)
-            for target in self._targets:
-                wx, wy = self._frame_to_widget(target.x, target.y)
-                
-                painter.setPen(QPen(QColor(0, 150, 255), 2))
-                painter.drawLine(wx - 15, wy, wx + 15, wy)
-                painter.drawLine(wx, wy - 15, wx, wy + 15)
-                painter.drawEllipse(wx - 8, wy - 8, 16, 16)
-                
-                # Label
-                painter.drawText(wx + 12, wy - 5, target.name)
+            painter.drawPixmap(0, 0, self._overlay_layer)
             
             # Draw current selection
             if self._selection_rect and not self._selection_rect.isEmpty():
                 if self._mode == "region":
-                    painter.setPen(QPen(QColor(255, 255, 0), 2, Qt.DashLine))
-                    painter.setBrush(QBrush(QColor(255, 255, 0, 40)))
+                    painter.setPen(self._sel_region_pen)
+                    painter.setBrush(self._sel_region_brush)
                 else:
-                    painter.setPen(QPen(QColor(0, 150, 255), 2, Qt.DashLine))
+                    painter.setPen(self._sel_tap_pen)
                 painter.drawRect(self._selection_rect)
-            
-            # Draw state label
-            painter.setPen(QPen(QColor(255, 255, 0)))
-            painter.setFont(QFont("Arial", 14, QFont.Bold))
-            painter.drawText(10, 25, f"State: {self._current_state}")
-            
-            # Draw mode indicator
-            mode_color = QColor(0, 255, 0) if self._mode == "region" else QColor(0, 150, 255)
-            painter.setPen(QPen(mode_color))
-            painter.drawText(10, 45, f"Mode: {self._mode.upper()}")
 
 
 class ScannerWidget(QWidget):
@@ -225,6 +357,8 @@ class ScannerWidget(QWidget):
         super().__init__(parent)
         self.game_loader = GameLoader()
         self.game_config: Optional[GameConfig] = None
+        # (type, name) per elements_list row
+        self._element_index: list[tuple[str, str]] = []
         
         self._setup_ui()
         self._connect_signals()
@@ -325,8 +459,7 @@ class ScannerWidget(QWidget):
         game_name = self.game_combo.currentData()
         if game_name:
             self.game_config = self.game_loader.load(game_name)
-            self._update_elements_list()
-            self._update_overlay()
+            self._refresh_elements()
     
     def _new_game(self):
         name, ok = QInputDialog.getText(self, "New Game", "Game name:")
@@ -357,8 +490,8 @@ class ScannerWidget(QWidget):
         self.game_config.regions[name] = Region(
             name=name, x=x, y=y, width=w, height=h
         )
-        self._update_elements_list()
-        self._update_overlay()
+        self.game_config.pack_arrays()
+        self._refresh_elements()
     
     def _on_tap_marked(self, name: str, x: int, y: int):
         """Handle new tap target"""
@@ -366,57 +499,56 @@ class ScannerWidget(QWidget):
             return
         
         self.game_config.targets[name] = TapTarget(name=name, x=x, y=y)
-        self._update_elements_list()
-        self._update_overlay()
+        self._refresh_elements()
     
     def _update_elements_list(self):
         """Update elements list widget"""
         self.elements_list.clear()
+        self._element_index = []
         
         if not self.game_config:
             return
         
+        # Rows map to _element_index by position, so items carry no data
+        labels = []
         for name, region in self.game_config.regions.items():
-            item = QListWidgetItem(f"📦 {name} ({region.x},{region.y} {region.width}x{region.height})")
-            item.setData(Qt.UserRole, {"type": "region", "name": name})
-            self.elements_list.addItem(item)
+            labels.append(f"📦 {name} ({region.x},{region.y} {region.width}x{region.height})")
+            self._element_index.append(("region", name))
         
         for name, target in self.game_config.targets.items():
-            item = QListWidgetItem(f"👆 {name} ({target.x},{target.y})")
-            item.setData(Qt.UserRole, {"type": "target", "name": name})
-            self.elements_list.addItem(item)
+            labels.append(f"👆 {name} ({target.x},{target.y})")
+            self._element_index.append(("target", name))
         
         for asset in self.game_config.assets:
-            item = QListWidgetItem(f"🖼️ {asset}")
-            item.setData(Qt.UserRole, {"type": "asset", "name": asset})
-            self.elements_list.addItem(item)
+            labels.append(f"🖼️ {asset}")
+            self._element_index.append(("asset", asset))
+        
+        self.elements_list.addItems(labels)
     
-    def _update_overlay(self):
-        """Update preview overlay"""
+    def _refresh_elements(self):
+        """Update the elements list and preview overlay after an edit"""
+        self._update_elements_list()
         if not self.game_config:
             return
         
+        # The preview snapshots the views, so no intermediate lists
         self.preview.set_overlay_data(
-            list(self.game_config.regions.values()),
-            list(self.game_config.targets.values())
+            self.game_config.regions.values(),
+            self.game_config.targets.values()
         )
     
     def _delete_element(self):
         """Delete selected element"""
-        item = self.elements_list.currentItem()
-        if not item or not self.game_config:
+        row = self.elements_list.currentRow()
+        if not 0 <= row < len(self._element_index) or not self.game_config:
             return
         
-        data = item.data(Qt.UserRole)
-        if not data:
-            return
-            
-        name = data["name"]
-        item_type = data["type"]
+        item_type, name = self._element_index[row]
         
         if item_type == "region":
             if name in self.game_config.regions:
                 del self.game_config.regions[name]
+                self.game_config.pack_arrays()
         elif item_type == "target":
             if name in self.game_config.targets:
                 del self.game_config.targets[name]
@@ -424,8 +556,7 @@ class ScannerWidget(QWidget):
             if name in self.game_config.assets:
                 self.game_config.assets.remove(name)
         
-        self._update_elements_list()
-        self._update_overlay()
+        self._refresh_elements()
     
     def _save_game(self):
         """Save game configuration"""
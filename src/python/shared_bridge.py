@@ -5,9 +5,11 @@ Python interface to shared memory for C-Core communication
 
 import ctypes
 import struct
+import time
 import mmap
 import posix_ipc
 import numpy as np
+import cv2
 from dataclasses import dataclass
 from enum import IntEnum
 from typing import Optional
@@ -15,6 +17,7 @@ from typing import Optional
 
 # Constants matching shared_bridge.h
 SHM_NAME = "/rashplayer_shm"
+RESULT_SEM_NAME = "/rashplayer_results"
 MAX_FRAME_WIDTH = 1920
 MAX_FRAME_HEIGHT = 1080
 FRAME_CHANNELS = 4
@@ -39,14 +42,15 @@ class ActionType(IntEnum):
     WAIT = 5
 
 
-@dataclass
-class VisionResult:
-    trigger_id: int
-    found: bool
-    confidence: float
-    location: tuple[int, int]
-    bounding_box: tuple[int, int, int, int]
-    timestamp_ns: int
+# Mirrors VisionResult in shared_bridge.h, including its alignment padding
+VISION_RESULT_DTYPE = np.dtype({
+    'names': ['trigger_id', 'found', 'confidence', 'loc_x', 'loc_y',
+              'bb_x', 'bb_y', 'bb_w', 'bb_h', 'timestamp_ns'],
+    'formats': ['<u4', '?', '<f4', '<i4', '<i4',
+                '<i4', '<i4', '<i4', '<i4', '<i8'],
+    'offsets': [0, 4, 8, 12, 16, 20, 24, 28, 32, 40],
+    'itemsize': 48
+})
 
 
 @dataclass
@@ -87,11 +91,28 @@ class SharedMemoryBridge:
     HEADER_SIZE = 4096  # Aligned header size
     VISION_RESULT_SIZE = 48  # Per result
     ACTION_COMMAND_SIZE = 32
+    MAX_RESULTS = 16
+    
+    # Field offsets within SharedMemoryHeader
+    LATENCY_OFFSET = 56
+    NUM_RESULTS_OFFSET = 88
+    RESULTS_OFFSET = 96
+    ACTION_OFFSET = RESULTS_OFFSET + MAX_RESULTS * VISION_RESULT_SIZE
+    
+    # Precompiled field codecs, used with pack_into/unpack_from on the mmap
+    _HEADER = struct.Struct("<IIQqIIIIiiiiqqqqII")
+    _U32 = struct.Struct("<I")
+    _U64 = struct.Struct("<Q")
+    _LATENCY = struct.Struct("<qqq")
+    _ACTION_COMMAND = struct.Struct("<Iiiiiiif")
+    _NO_RESULTS = np.empty(0, dtype=VISION_RESULT_DTYPE)
     
     def __init__(self):
         self._shm: Optional[posix_ipc.SharedMemory] = None
         self._mmap: Optional[mmap.mmap] = None
         self._frame_offset = self.HEADER_SIZE
+        self._frame_view: Optional[np.ndarray] = None
+        self._result_sem: Optional[posix_ipc.Semaphore] = None
         
     def create(self, width: int = MAX_FRAME_WIDTH, height: int = MAX_FRAME_HEIGHT) -> bool:
         """Create shared memory segment"""
@@ -119,6 +140,8 @@ class SharedMemoryBridge:
             
             # Initialize header
             self._write_header(width, height)
+            self._map_frame_view()
+            self._open_result_sem()
             return True
             
         except Exception as e:
@@ -137,6 +160,8 @@ class SharedMemoryBridge:
                 mmap.PROT_READ | mmap.PROT_WRITE
             )
             
+            self._map_frame_view()
+            self._open_result_sem()
             return self._verify_magic()
             
         except Exception as e:
@@ -145,12 +170,17 @@ class SharedMemoryBridge:
     
     def detach(self) -> None:
         """Detach from shared memory"""
+        # The view exports the mmap buffer and must go before close()
+        self._frame_view = None
         if self._mmap:
             self._mmap.close()
             self._mmap = None
         if self._shm:
             self._shm.close_fd()
             self._shm = None
+        if self._result_sem:
+            self._result_sem.close()
+            self._result_sem = None
     
     def destroy(self) -> None:
         """Destroy shared memory segment"""
@@ -159,17 +189,30 @@ class SharedMemoryBridge:
             posix_ipc.unlink_shared_memory(SHM_NAME)
         except posix_ipc.ExistentialError:
             pass
+        try:
+            posix_ipc.unlink_semaphore(RESULT_SEM_NAME)
+        except posix_ipc.ExistentialError:
+            pass
+    
+    def _open_result_sem(self) -> None:
+        """Open (or create) the semaphore C-Core posts whenever it sets result_ready"""
+        # Not unlinked on create: a C-Core that is already running keeps
+        # posting to the semaphore it opened
+        try:
+            self._result_sem = posix_ipc.Semaphore(RESULT_SEM_NAME, posix_ipc.O_CREAT, initial_value=0)
+        except (posix_ipc.Error, OSError) as e:
+            # Optional: wait_results() degrades to a plain sleep
+            print(f"Result semaphore unavailable, polling instead: {e}")
+            self._result_sem = None
     
     def _write_header(self, width: int, height: int) -> None:
         """Initialize header with default values"""
         if not self._mmap:
             return
             
-        self._mmap.seek(0)
-        
         # Write header fields
-        header = struct.pack(
-            "<IIQqIIIIiiiiqqqqII",
+        self._HEADER.pack_into(
+            self._mmap, 0,
             0x52415348,  # magic = "RASH"
             1,           # version
             0,           # frame_number
@@ -189,92 +232,93 @@ class SharedMemoryBridge:
             0,           # num_results
             0            # _padding4
         )
+    
+    def _map_frame_view(self) -> None:
+        """Map the frame region as an ndarray sharing memory with the mmap"""
+        if len(self._mmap) - self._frame_offset < FRAME_BUFFER_SIZE:
+            self._frame_view = None
+            return
         
-        self._mmap.write(header)
+        self._frame_view = np.frombuffer(
+            self._mmap, dtype=np.uint8,
+            count=FRAME_BUFFER_SIZE, offset=self._frame_offset
+        ).reshape(MAX_FRAME_HEIGHT, MAX_FRAME_WIDTH, FRAME_CHANNELS)
     
     def _verify_magic(self) -> bool:
         """Verify shared memory magic number"""
         if not self._mmap:
             return False
-        self._mmap.seek(0)
-        magic = struct.unpack("<I", self._mmap.read(4))[0]
+        magic = self._U32.unpack_from(self._mmap, 0)[0]
         return magic == 0x52415348
     
     def write_frame(self, frame: np.ndarray) -> bool:
         """Write a frame to shared memory"""
-        if not self._mmap:
+        if not self._mmap or self._frame_view is None:
             return False
         
-        # Ensure RGBA format
-        if frame.ndim == 3 and frame.shape[2] == 3:
-            frame = np.dstack([frame, np.full(frame.shape[:2], 255, dtype=np.uint8)])
-        
         # Resize if needed
         h, w = frame.shape[:2]
         if h != MAX_FRAME_HEIGHT or w != MAX_FRAME_WIDTH:
-            from PIL import Image
-            img = Image.fromarray(frame)
-            img = img.resize((MAX_FRAME_WIDTH, MAX_FRAME_HEIGHT))
-            frame = np.array(img)
+            frame = cv2.resize(frame, (MAX_FRAME_WIDTH, MAX_FRAME_HEIGHT))
         
-        # Write frame data
-        self._mmap.seek(self._frame_offset)
-        self._mmap.write(frame.tobytes())
+        # Write frame data straight into the mapped buffer; numpy drops the
+        # GIL for the bulk copy so capture and UI threads keep running
+        if frame.ndim == 3 and frame.shape[2] == 3:
+            # Expand RGB to RGBA in place
+            self._frame_view[..., :3] = frame
+            self._frame_view[..., 3] = 255
+        else:
+            np.copyto(self._frame_view, frame)
         
         # Update frame counter and set ready flag
-        self._mmap.seek(8)  # frame_number offset
-        frame_num = struct.unpack("<Q", self._mmap.read(8))[0]
-        self._mmap.seek(8)
-        self._mmap.write(struct.pack("<Q", frame_num + 1))
+        frame_num = self._U64.unpack_from(self._mmap, 8)[0]  # frame_number offset
+        self._U64.pack_into(self._mmap, 8, frame_num + 1)
         
         # Set frame_ready = 1
-        self._mmap.seek(24)
-        self._mmap.write(struct.pack("<I", 1))
+        self._U32.pack_into(self._mmap, 24, 1)
         
         return True
     
-    def read_results(self) -> tuple[bool, list[VisionResult], Optional[ActionCommand]]:
-        """Read vision results and pending action from C-Core"""
+    def wait_results(self, timeout: float) -> bool:
+        """Block until C-Core posts a result or timeout seconds pass.
+        
+        Only a hint: posts can outnumber reads, and a C-Core without the
+        semaphore never posts, so callers should check read_results()
+        whatever this returns.
+        """
+        if self._result_sem is None:
+            time.sleep(timeout)
+            return False
+        try:
+            self._result_sem.acquire(timeout)
+            return True
+        except posix_ipc.BusyError:
+            return False
+    
+    def read_results(self) -> tuple[bool, np.ndarray, Optional[ActionCommand]]:
+        """Read vision results (VISION_RESULT_DTYPE records) and pending action from C-Core"""
         if not self._mmap:
-            return False, [], None
+            return False, self._NO_RESULTS, None
         
         # Check if result is ready
-        self._mmap.seek(28)  # result_ready offset
-        result_ready = struct.unpack("<I", self._mmap.read(4))[0]
+        result_ready = self._U32.unpack_from(self._mmap, 28)[0]  # result_ready offset
         
         if not result_ready:
-            return False, [], None
+            return False, self._NO_RESULTS, None
         
         # Read number of results
-        self._mmap.seek(80)  # num_results offset
-        num_results = struct.unpack("<I", self._mmap.read(4))[0]
-        
-        results = []
-        result_offset = 88  # After header fields
+        num_results = self._U32.unpack_from(self._mmap, self.NUM_RESULTS_OFFSET)[0]
         
-        for i in range(min(num_results, 16)):
-            self._mmap.seek(result_offset + i * self.VISION_RESULT_SIZE)
-            data = self._mmap.read(self.VISION_RESULT_SIZE)
-            
-            trigger_id, found, confidence, loc_x, loc_y, bb_x, bb_y, bb_w, bb_h, ts = \
-                struct.unpack("<I?fiiiiiiQ", data[:44])
-            
-            results.append(VisionResult(
-                trigger_id=trigger_id,
-                found=found,
-                confidence=confidence,
-                location=(loc_x, loc_y),
-                bounding_box=(bb_x, bb_y, bb_w, bb_h),
-                timestamp_ns=ts
-            ))
+        # One copy of the whole result block; C may overwrite it once
+        # result_ready is cleared, so the view must not escape
+        results = np.frombuffer(
+            self._mmap, dtype=VISION_RESULT_DTYPE,
+            count=min(num_results, self.MAX_RESULTS), offset=self.RESULTS_OFFSET
+        ).copy()
         
         # Read pending action
-        action_offset = 88 + 16 * self.VISION_RESULT_SIZE
-        self._mmap.seek(action_offset)
-        action_data = self._mmap.read(self.ACTION_COMMAND_SIZE)
-        
         action_type, sx, sy, ex, ey, dur, hold, rand = \
-            struct.unpack("<Iiiiiiif", action_data)
+            self._ACTION_COMMAND.unpack_from(self._mmap, self.ACTION_OFFSET)
         
         action = None
         if action_type != ActionType.NONE:
@@ -288,8 +332,7 @@ class SharedMemoryBridge:
             )
         
         # Clear result_ready flag
-        self._mmap.seek(28)
-        self._mmap.write(struct.pack("<I", 0))
+        self._U32.pack_into(self._mmap, 28, 0)
         
         return True, results, action
     
@@ -298,8 +341,7 @@ class SharedMemoryBridge:
         if not self._mmap:
             return 0, 0, 0
         
-        self._mmap.seek(48)
-        vision_ns, brain_ns, total_ns = struct.unpack("<qqq", self._mmap.read(24))
+        vision_ns, brain_ns, total_ns = self._LATENCY.unpack_from(self._mmap, self.LATENCY_OFFSET)
         
         return vision_ns // 1000, brain_ns // 1000, total_ns // 1000
     
@@ -308,6 +350,5 @@ class SharedMemoryBridge:
         if not self._mmap:
             return GameState.ERROR
         
-        self._mmap.seek(32)
-        state = struct.unpack("<I", self._mmap.read(4))[0]
+        state = self._U32.unpack_from(self._mmap, 32)[0]
         return GameState(state)
@@ -5,6 +5,7 @@ Loads game workflows from YAML files and primes the C-Brain
 
 import yaml
 import ctypes
+import numpy as np
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional, Any
@@ -189,6 +190,16 @@ class CDecisionRule(ctypes.Structure):
     ]
 
 
+# numpy mirror of CDecisionRule so a rule table can be filled column-wise
+# and handed to the C-Brain without per-field ctypes assignments
+_DECISION_RULE_DTYPE = np.dtype([
+    ("condition", "S256"),
+    ("action", np.int32),
+    ("action_target", [("x", np.int32), ("y", np.int32)]),
+    ("priority", np.int32)
+], align=True)
+
+
 class BrainPrimer:
     """Primes the C-Brain with workflow configuration via ctypes"""
     
@@ -217,16 +228,15 @@ class BrainPrimer:
         
         # Convert rules to C format
         if config.rules:
-            c_rules = (CDecisionRule * len(config.rules))()
-            
-            for i, rule in enumerate(config.rules):
-                c_rules[i].condition = rule.condition.encode('utf-8')[:255]
-                c_rules[i].action = int(rule.action)
-                c_rules[i].action_target.x = rule.target[0]
-                c_rules[i].action_target.y = rule.target[1]
-                c_rules[i].priority = rule.priority
+            rules = config.rules
+            c_rules = np.zeros(len(rules), dtype=_DECISION_RULE_DTYPE)
+            c_rules["condition"] = [r.condition.encode('utf-8')[:255] for r in rules]
+            c_rules["action"] = [int(r.action) for r in rules]
+            c_rules["action_target"] = [r.target for r in rules]
+            c_rules["priority"] = [r.priority for r in rules]
             
-            if self.lib.brain_load_rules(c_rules, len(config.rules)) != 0:
+            rules_ptr = c_rules.ctypes.data_as(ctypes.POINTER(CDecisionRule))
+            if self.lib.brain_load_rules(rules_ptr, len(rules)) != 0:
                 return False
         
         return True